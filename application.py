@@ -1,16 +1,100 @@
-from flask import Flask, request, render_template, jsonify
+import time
+from flask import Flask, request, render_template, jsonify, g, Response
 from flask_cors import CORS, cross_origin
-from src.pipeline.predict_pipeline import CustomData, PredictPipeline
-import logging
+from src.pipeline.predict_pipeline import CustomBatchData, PredictPipeline
+from src.schema import SchemaValidationError, validate_features
+from src.pipeline.model_registry import model_registry
+from src.pipeline.micro_batcher import MicroBatcher
+from src.pipeline.prediction_cache import PredictionCache
+from src.pipeline.inference_pool import InferencePool, InferenceRejectedError
+from src.metrics import metrics
+from src.memory import process_memory_metrics
+from src.logger import request_logger, sample_request
+import numpy as np
 
 application = Flask(__name__)
 CORS(application)  # This will enable CORS for all routes
 
 app = application
 
-# Configuring logging
-logging.basicConfig(level=logging.DEBUG,
-                    format="[%(asctime)s] {%(pathname)s:%(lineno)d} %(levelname)s - %(message)s")
+# Logging is configured by src.logger (LOG_ASYNC, LOG_FORMAT, LOG_REQUEST_STEPS, LOG_REQUEST_SAMPLE_RATE)
+
+# Opt-in pool of preloaded processes for model work (INFERENCE_POOL=1); request threads
+# only parse, validate and encode, and excess load is shed with 429/503
+inference_pool = InferencePool()
+if inference_pool.enabled:
+    inference_pool.start()
+    predict_rows = inference_pool.predict_rows
+    predict_batch = inference_pool.predict_batch
+else:
+    # Load the model artifacts once per worker, off the request path
+    model_registry.warm(background=True)
+    predict_rows = PredictPipeline().predict_rows
+    predict_batch = PredictPipeline().predict_batch
+
+def model_version():
+    """ Version predictions are computed with; in pool mode as reported by the pool workers. """
+    return inference_pool.model_version() if inference_pool.enabled else model_registry.version
+
+# Opt-in coalescing of concurrent single-row predictions (PREDICT_MICRO_BATCHING=1)
+# In pool mode batches are dispatched without blocking, one in flight per pool process
+if inference_pool.enabled:
+    micro_batcher = MicroBatcher(predict_rows, submit_fn=inference_pool.submit_rows,
+                                 max_in_flight=inference_pool.config.workers)
+else:
+    micro_batcher = MicroBatcher(predict_rows)
+
+# Repeated catalog stones are answered from cache until the model version changes
+prediction_cache = PredictionCache()
+
+# Request counters and latency histograms, exported on /metrics together with the
+# micro-batcher and cache statistics
+REQUEST_SECONDS = metrics.histogram('http_request_duration_seconds', 'Request latency by route.', ['route'])
+REQUESTS = metrics.counter('http_requests_total', 'Requests served by route and status code.', ['route', 'status'])
+PARSE_SECONDS = metrics.histogram('request_parse_seconds', 'Time to parse and convert request fields.', ['route'])
+metrics.register_collector('micro_batcher', micro_batcher.metrics)
+metrics.register_collector('prediction_cache', prediction_cache.metrics)
+metrics.register_collector('inference_pool', inference_pool.metrics)
+metrics.register_collector('process_memory', process_memory_metrics)
+
+def log_step(message, *args):
+    """ Per-request STEP log, written only for requests picked by the sampler. """
+    if g.get('log_steps'):
+        request_logger.info(message, *args)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.log_steps = sample_request()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.endpoint or 'unknown'
+        REQUEST_SECONDS.labels(route).observe(time.perf_counter() - start)
+        REQUESTS.labels(route, response.status_code).inc()
+    return response
+
+@app.errorhandler(SchemaValidationError)
+def schema_validation_failed(e):
+    """
+    Malformed or out-of-range input: every problem found, with its row and field, before any model work.
+    """
+    request_logger.warning("Rejected payload with %d errors: %s", e.n_errors, e)
+    return jsonify(e.to_dict()), e.status_code
+
+@app.errorhandler(InferenceRejectedError)
+def inference_rejected(e):
+    """
+    Load shedding: 429 when too many predictions are pending, 503 when the pool cannot answer in time.
+    """
+    request_logger.warning("Prediction rejected with %d: %s", e.status_code, e)
+    response = jsonify({'errors': [str(e)]})
+    response.status_code = e.status_code
+    if e.retry_after is not None:
+        response.headers['Retry-After'] = str(e.retry_after)
+    return response
 
 @app.route('/')
 @cross_origin()
@@ -19,9 +103,39 @@ def home_page():
     Home page route.
     Renders the main template (index.html).
     """
-    logging.info("STEP 1: Accessing the homepage.")
+    log_step("STEP 1: Accessing the homepage.")
     return render_template('index.html')
 
+@app.route('/health')
+def health_check():
+    """
+    Readiness route for the Elastic Beanstalk health check.
+    Returns 503 until the model artifacts are loaded in this worker (or its inference pool).
+    """
+    status = inference_pool.status() if inference_pool.enabled else model_registry.status()
+    return jsonify(status), (200 if status['ready'] else 503)
+
+@app.route('/batcherMetrics')
+def batcher_metrics():
+    """
+    Queue depth, batch size and wait time statistics of the micro-batcher in this worker.
+    """
+    return jsonify(micro_batcher.metrics())
+
+@app.route('/cacheMetrics')
+def cache_metrics():
+    """
+    Hit, miss and eviction counters of the prediction cache in this worker.
+    """
+    return jsonify(prediction_cache.metrics())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Counters and latency histograms of this worker in the Prometheus text format.
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/predict', methods=['GET', 'POST'])
 @cross_origin()
 def predict_datapoint():
@@ -30,36 +144,27 @@ def predict_datapoint():
     Handles both GET (rendering form) and POST (handling form submission and prediction) methods.
     """
     if request.method == 'GET':
-        logging.info("STEP 1: Accessing the prediction form via GET request.")
+        log_step("STEP 1: Accessing the prediction form via GET request.")
         return render_template('index.html')
     else:
-        logging.info("STEP 1: Received POST request for prediction.")
+        log_step("STEP 1: Received POST request for prediction.")
         
-        logging.info("STEP 2: Extracting data from form submission.")
-        data = CustomData(
-            carat=float(request.form.get('carat')),
-            depth=float(request.form.get('depth')),
-            table=float(request.form.get('table')),
-            x=float(request.form.get('x')),
-            y=float(request.form.get('y')),
-            z=float(request.form.get('z')),
-            cut=request.form.get('cut'),
-            color=request.form.get('color'),
-            clarity=request.form.get('clarity')
-        )
-
-        logging.info("STEP 3: Converting data to DataFrame format.")
-        pred_df = data.get_data_as_dataframe()
+        log_step("STEP 2: Validating form submission against the schema.")
+        parse_start = time.perf_counter()
+        data = validate_features(request.form.to_dict(), max_rows=1)
+
+        log_step("STEP 3: Converting data to feature array.")
+        features = data.as_rows()
+        PARSE_SECONDS.labels('predict_datapoint').observe(time.perf_counter() - parse_start)
         
-        logging.info("STEP 4: Initializing prediction pipeline.")
-        predict_pipeline = PredictPipeline()
+        log_step("STEP 4: Routing request to the prediction pipeline.")
 
-        logging.info("STEP 5: Making price prediction using the model.")
-        pred = predict_pipeline.predict(pred_df)
-        results = round(pred[0], 2)
+        log_step("STEP 5: Making price prediction using the model.")
+        pred = prediction_cache.get_or_compute(features, model_version(), micro_batcher.predict)
+        results = round(pred, 2)
 
-        logging.info(f"STEP 6: Returning predicted price: {results}")
-        return render_template('index.html', results=results, pred_df=pred_df)
+        log_step("STEP 6: Returning predicted price: %s", results)
+        return render_template('index.html', results=results)
 
 @app.route('/predictAPI', methods=['POST'])
 @cross_origin()
@@ -68,34 +173,52 @@ def predict_api():
     API route to predict gemstone price based on JSON data.
     Expects a POST request with JSON data.
     """
-    logging.info("API STEP 1: Received POST request for prediction via API.")
+    log_step("API STEP 1: Received POST request for prediction via API.")
     
-    logging.info("API STEP 2: Extracting data from JSON payload.")
-    data = CustomData(
-        carat=float(request.json['carat']),
-        depth=float(request.json['depth']),
-        table=float(request.json['table']),
-        x=float(request.json['x']),
-        y=float(request.json['y']),
-        z=float(request.json['z']),
-        cut=request.json['cut'],
-        color=request.json['color'],
-        clarity=request.json['clarity']
-    )
-
-    logging.info("API STEP 3: Converting data to DataFrame format.")
-    pred_df = data.get_data_as_dataframe()
+    log_step("API STEP 2: Validating JSON payload against the schema.")
+    parse_start = time.perf_counter()
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        raise SchemaValidationError([{'message': 'body must be a JSON object with the gemstone fields'}])
+    data = validate_features(payload, max_rows=1)
 
-    logging.info("API STEP 4: Initializing prediction pipeline.")
-    predict_pipeline = PredictPipeline()
+    log_step("API STEP 3: Converting data to feature array.")
+    features = data.as_rows()
+    PARSE_SECONDS.labels('predict_api').observe(time.perf_counter() - parse_start)
+
+    log_step("API STEP 4: Routing request to the prediction pipeline.")
 
-    logging.info("API STEP 5: Making price prediction using the model.")
-    pred = predict_pipeline.predict(pred_df)
+    log_step("API STEP 5: Making price prediction using the model.")
+    pred = prediction_cache.get_or_compute(features, model_version(), micro_batcher.predict)
 
-    dct = {'price': round(pred[0], 2)}
+    dct = {'price': round(pred, 2)}
 
-    logging.info(f"API STEP 6: Returning predicted price: {dct['price']}")
+    log_step("API STEP 6: Returning predicted price: %s", dct['price'])
     return jsonify(dct)
 
+@app.route('/predictBatch', methods=['POST'])
+@cross_origin()
+def predict_batch_api():
+    """
+    API route to predict prices for many gemstones at once.
+    Accepts a JSON array of records or an object of columns; an optional
+    `chunk_size` query parameter overrides the configured chunk size.
+    """
+    log_step("BATCH STEP 1: Received POST request for batch prediction.")
+    predict_pipeline = PredictPipeline()
+
+    log_step("BATCH STEP 2: Validating batch payload.")
+    chunk_size = request.args.get('chunk_size', type=int)
+    if chunk_size is not None and chunk_size <= 0:
+        raise SchemaValidationError([{'field': 'chunk_size', 'message': 'must be a positive integer'}])
+    data = CustomBatchData(request.get_json(silent=True), max_rows=predict_pipeline.config.max_batch_rows)
+    pred_df = data.get_data_as_dataframe()
+
+    log_step("BATCH STEP 3: Scoring %d rows.", len(pred_df))
+    pred = predict_batch(pred_df, chunk_size=chunk_size)
+
+    log_step("BATCH STEP 4: Returning predicted prices.")
+    return jsonify({'price': np.round(pred, 2).tolist()})
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8000)
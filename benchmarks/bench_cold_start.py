@@ -0,0 +1,147 @@
+"""
+Cold-start benchmark for the serving path.
+
+Every measurement runs in a fresh interpreter, the way a new Elastic Beanstalk instance starts:
+
+  - imports:  `python -X importtime` over the serving modules; reports the total import time,
+              the slowest top-level packages, and which heavy training-side libraries (sklearn,
+              CatBoost, XGBoost, pandas, dill, joblib) were imported before any model is loaded
+  - startup:  `import application`, time until the background model load (including the warmup
+              batch) is ready, then the latency of the first and second single-row predictions;
+              repeated with MODEL_WARMUP_ROWS=0 to show what the warmup saves the first request
+
+The serving modules are imported directly for the import profile because importing
+`application` also starts the background model load, whose imports would be mixed in.
+
+Usage:
+    python benchmarks/bench_cold_start.py --repeats 5 --output cold_start.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVING_MODULES = [
+    'flask',
+    'src.schema',
+    'src.metrics',
+    'src.pipeline.model_registry',
+    'src.pipeline.predict_pipeline',
+    'src.pipeline.micro_batcher',
+    'src.pipeline.prediction_cache',
+    'src.pipeline.inference_pool',
+]
+HEAVY_MODULES = ['pandas', 'sklearn', 'catboost', 'xgboost', 'dill', 'joblib', 'scipy']
+
+IMPORT_SCRIPT = """
+import sys, json
+{imports}
+print(json.dumps(sorted(name for name in {heavy!r} if name in sys.modules)))
+"""
+
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import application
+imported = time.perf_counter()
+application.model_registry.wait_until_ready()
+ready = time.perf_counter()
+from src.schema import validate_features
+row = validate_features(json.loads({row!r})).as_rows()
+pipeline = application.PredictPipeline()
+pipeline.predict_rows(row)
+first = time.perf_counter()
+pipeline.predict_rows(row)
+second = time.perf_counter()
+print(json.dumps({{'import_seconds': imported - start, 'ready_seconds': ready - start,
+                  'warmup_seconds': application.model_registry.status()['warmup_seconds'],
+                  'first_prediction_ms': 1000 * (first - ready), 'second_prediction_ms': 1000 * (second - first),
+                  'time_to_first_prediction_seconds': first - start}}))
+"""
+
+SAMPLE_ROW = {'carat': 0.7, 'depth': 61.5, 'table': 57.0, 'x': 5.7, 'y': 5.72, 'z': 3.51,
+              'cut': 'Ideal', 'color': 'G', 'clarity': 'VS2'}
+
+
+def parse_importtime(stderr) -> list:
+    """ Top-level packages from `-X importtime` output as (name, cumulative seconds). """
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented under their importer; top-level ones follow a single space
+        if len(name) - len(name.lstrip()) <= 1:
+            name = name.strip()
+            packages[name] = packages.get(name, 0.0) + int(cumulative) / 1e6
+    return sorted(packages.items(), key=lambda item: -item[1])
+
+
+def profile_imports(top) -> dict:
+    script = IMPORT_SCRIPT.format(imports='\n'.join(f'import {name}' for name in SERVING_MODULES),
+                                  heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    packages = parse_importtime(output.stderr)
+    return {
+        'total_seconds': sum(seconds for _, seconds in packages),
+        'slowest': [{'module': name, 'seconds': seconds} for name, seconds in packages[:top]],
+        'heavy_modules_imported': json.loads(output.stdout.strip().splitlines()[-1]),
+    }
+
+
+def run_startup(warmup_rows) -> dict:
+    env = dict(os.environ, INFERENCE_POOL='0', PREDICT_CACHE_ENABLED='0')
+    if warmup_rows is not None:
+        env['MODEL_WARMUP_ROWS'] = str(warmup_rows)
+    output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT.format(row=json.dumps(SAMPLE_ROW))],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs) -> dict:
+    # warmup_seconds is None when MODEL_WARMUP_ROWS=0 skipped the warmup
+    return {key: statistics.median(run[key] or 0.0 for run in runs) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5, help='Fresh interpreters per startup scenario')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to report')
+    parser.add_argument('--output', default=None, help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {
+        'created_at': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'imports': profile_imports(args.top),
+    }
+    imports = results['imports']
+    print(f"serving imports: {imports['total_seconds']:.3f}s, heavy modules imported: "
+          f"{', '.join(imports['heavy_modules_imported']) or 'none'}")
+    for item in imports['slowest']:
+        print(f"  {item['module']:<40} {item['seconds']:.3f}s")
+
+    results['startup'] = {}
+    for name, warmup_rows in (('warmup', None), ('no_warmup', 0)):
+        summary = summarize([run_startup(warmup_rows) for _ in range(args.repeats)])
+        results['startup'][name] = summary
+        print(f"{name}: import {summary['import_seconds']:.3f}s, ready {summary['ready_seconds']:.3f}s, "
+              f"first prediction {summary['first_prediction_ms']:.1f}ms, "
+              f"second {summary['second_prediction_ms']:.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as file_obj:
+            json.dump(results, file_obj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+Latency and throughput benchmark for the serving path.
+
+Replays rows from artifacts/test.csv against:
+  - direct:  PredictPipeline.predict (DataFrame), PredictPipeline.predict_rows (fast path)
+             and PredictPipeline.predict_batch at several batch sizes
+  - api:     POST /predictAPI (JSON)
+  - form:    POST /predict (form fields)
+
+Routes are exercised through Flask's test client by default, or against a running server with
+--url. Each scenario reports p50/p95/p99 latency and throughput at every concurrency level, and
+a fresh interpreter measures cold start (import, model load, first prediction).
+
+Usage:
+    python benchmarks/bench_serving.py --requests 500 --concurrency 1 4 16 --output serving.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import urllib.request
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ['carat', 'depth', 'table', 'x', 'y', 'z', 'cut', 'color', 'clarity']
+
+COLD_START_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import application
+imported = time.perf_counter()
+application.model_registry.load()
+loaded = time.perf_counter()
+from src.schema import validate_features
+row = validate_features(json.loads({row!r})).as_rows()
+application.PredictPipeline().predict_rows(row)
+predicted = time.perf_counter()
+print(json.dumps({{'import_seconds': imported - start, 'load_seconds': loaded - imported,
+                  'first_prediction_seconds': predicted - loaded, 'total_seconds': predicted - start}}))
+"""
+
+
+def summarize(latencies, wall_seconds) -> dict:
+    latencies = np.asarray(latencies) * 1000.0
+    return {
+        'requests': len(latencies),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'mean_ms': float(latencies.mean()),
+        'max_ms': float(latencies.max()),
+        'throughput_rps': len(latencies) / wall_seconds,
+    }
+
+
+def run_load(call, payloads, concurrency) -> dict:
+    """ Issue one call per payload from `concurrency` threads and time each call. """
+    def timed(payload):
+        start = time.perf_counter()
+        call(payload)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        latencies = [timed(payload) for payload in payloads]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(timed, payloads))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def route_callers(url):
+    """ (api_call, form_call) posting to a live server at `url`, or to the in-process app. """
+    if url:
+        def api_call(record):
+            request = urllib.request.Request(url + '/predictAPI', data=json.dumps(record).encode(),
+                                             headers={'Content-Type': 'application/json'})
+            urllib.request.urlopen(request).read()
+
+        def form_call(record):
+            urllib.request.urlopen(url + '/predict', data=urllib.parse.urlencode(record).encode()).read()
+        return api_call, form_call
+
+    import application
+    client = application.app.test_client()
+
+    def api_call(record):
+        response = client.post('/predictAPI', json=record)
+        assert response.status_code == 200, response.data
+
+    def form_call(record):
+        response = client.post('/predict', data=record)
+        assert response.status_code == 200, response.data
+    return api_call, form_call
+
+
+def cold_start(record) -> dict:
+    output = subprocess.run(
+        [sys.executable, '-c', COLD_START_SCRIPT.format(row=json.dumps(record))],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=os.path.join(ROOT, 'artifacts', 'test.csv'))
+    parser.add_argument('--requests', type=int, default=500, help='Requests per scenario and concurrency level')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 256, 1024])
+    parser.add_argument('--url', default=None, help='Benchmark a running server instead of the in-process app')
+    parser.add_argument('--with-cache', action='store_true', help='Leave the prediction cache enabled')
+    parser.add_argument('--skip-cold-start', action='store_true')
+    parser.add_argument('--output', default=None, help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    if not args.with_cache:
+        os.environ['PREDICT_CACHE_ENABLED'] = '0'
+    os.chdir(ROOT)
+
+    df = pd.read_csv(args.data)[FEATURES]
+    sample = df.sample(n=min(args.requests, len(df)), random_state=42, replace=args.requests > len(df))
+    records = [{key: (value.item() if hasattr(value, 'item') else value) for key, value in row.items()}
+               for row in sample.to_dict(orient='records')]
+
+    results = {
+        'created_at': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'target': args.url or 'in-process',
+        'requests_per_scenario': len(records),
+    }
+
+    if not args.skip_cold_start:
+        results['cold_start'] = cold_start(records[0])
+
+    from src.pipeline.predict_pipeline import PredictPipeline
+    from src.pipeline.model_registry import model_registry
+    pipeline = PredictPipeline()
+    model_registry.load()
+    results['model_version'] = model_registry.version
+
+    frames = [pd.DataFrame([record]) for record in records]
+    rows = [np.array([[record[key] for key in FEATURES]], dtype=object) for record in records]
+    api_call, form_call = route_callers(args.url)
+
+    scenarios = {
+        'direct_predict_dataframe': (pipeline.predict, frames),
+        'direct_predict_rows': (pipeline.predict_rows, rows),
+        'api_predictAPI': (api_call, records),
+        'form_predict': (form_call, [{key: str(value) for key, value in record.items()} for record in records]),
+    }
+    results['scenarios'] = {}
+    for name, (call, payloads) in scenarios.items():
+        call(payloads[0])
+        results['scenarios'][name] = {
+            str(level): run_load(call, payloads, level) for level in args.concurrency
+        }
+        print(f'{name}: ' + ', '.join(f"c={level} p50 {stats['p50_ms']:.2f}ms p99 {stats['p99_ms']:.2f}ms"
+                                      for level, stats in results['scenarios'][name].items()))
+
+    results['batches'] = {}
+    for batch_size in args.batch_sizes:
+        batch = df.sample(n=batch_size, random_state=0, replace=batch_size > len(df)).reset_index(drop=True)
+        repeats = max(3, min(50, 20000 // batch_size))
+        stats = run_load(lambda frame: pipeline.predict_batch(frame), [batch] * repeats, 1)
+        stats['rows_per_second'] = stats['throughput_rps'] * batch_size
+        results['batches'][str(batch_size)] = stats
+        print(f"batch {batch_size}: p50 {stats['p50_ms']:.2f}ms, {stats['rows_per_second']:.0f} rows/s")
+
+    # Sequential vs parallel member execution, checked bit-for-bit against VotingRegressor.predict
+    from src.pipeline.ensemble_executor import EnsembleExecutor, EnsembleExecutorConfig
+    preprocessor, model = model_registry.get()
+    executors = {
+        'sequential': EnsembleExecutor(EnsembleExecutorConfig(parallel=False)),
+        'parallel': EnsembleExecutor(EnsembleExecutorConfig(parallel=True, min_parallel_rows=1)),
+    }
+    results['ensemble_executor'] = {}
+    for batch_size in args.batch_sizes:
+        batch = df.sample(n=batch_size, random_state=1, replace=batch_size > len(df)).reset_index(drop=True)
+        data = preprocessor.transform(batch)
+        expected = model.predict(data)
+        repeats = max(3, min(50, 20000 // batch_size))
+        entry = {}
+        for name, executor in executors.items():
+            entry[name] = run_load(lambda x: executor.predict(model, x), [data] * repeats, 1)
+            entry[name]['bit_identical'] = bool(np.array_equal(executor.predict(model, data), expected))
+        results['ensemble_executor'][str(batch_size)] = entry
+        print(f"ensemble batch {batch_size}: sequential p50 {entry['sequential']['p50_ms']:.2f}ms, "
+              f"parallel p50 {entry['parallel']['p50_ms']:.2f}ms, "
+              f"identical {entry['sequential']['bit_identical'] and entry['parallel']['bit_identical']}")
+
+    if args.output:
+        with open(args.output, 'w') as file_obj:
+            json.dump(results, file_obj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
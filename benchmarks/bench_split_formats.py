@@ -0,0 +1,75 @@
+"""
+Load-time and peak-memory comparison of the CSV splits against the columnar format.
+
+Usage:
+    python benchmarks/bench_split_formats.py --csv artifacts/test.csv --output split_formats.json
+
+The CSV is converted once into a temporary columnar dataset; each loader then runs `--repeat`
+times. Peak memory is the tracemalloc peak of a single load (NumPy and pandas buffers included).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from src.columnar import save_columnar, load_columnar
+
+
+def measure(loader, repeat) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = loader()
+        timings.append(time.perf_counter() - start)
+        del df
+
+    tracemalloc.start()
+    df = loader()
+    # Touch every column so memory-mapped pages are actually read
+    checksum = float(df.select_dtypes('number').sum().sum())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'rows': len(df),
+        'best_seconds': min(timings),
+        'mean_seconds': sum(timings) / len(timings),
+        'peak_mb': peak / 2**20,
+        'checksum': checksum,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', default=os.path.join('artifacts', 'test.csv'))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None, help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        columnar_dir = os.path.join(tmp_dir, 'split')
+        save_columnar(pd.read_csv(args.csv), columnar_dir)
+
+        results = {
+            'source': args.csv,
+            'csv': measure(lambda: pd.read_csv(args.csv), args.repeat),
+            'columnar_mmap': measure(lambda: load_columnar(columnar_dir), args.repeat),
+            'columnar_read': measure(lambda: load_columnar(columnar_dir, mmap=False), args.repeat),
+        }
+    results['speedup_mmap'] = results['csv']['best_seconds'] / results['columnar_mmap']['best_seconds']
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as file_obj:
+            json.dump(results, file_obj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
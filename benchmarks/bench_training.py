@@ -0,0 +1,228 @@
+"""
+Scaling benchmark and profiler for the training pipeline.
+
+Generates synthetic gemstone datasets with the schema of artifacts/test.csv (numerics resampled
+from the real rows with 1% jitter, categories drawn with their observed frequencies, price taken
+from the same reference row with 3% noise) and runs every training stage on them:
+
+    ingest -> transform -> bake-off (evaluate_models_detailed) -> CatBoost/KNN search -> VotingRegressor fit
+
+Each size runs in its own subprocess inside a scratch directory, so artifacts and peak RSS never
+leak between sizes. Per stage it records wall time, CPU time (including worker processes) and the
+peak RSS reached during the stage (sampled from /proc; falls back to ru_maxrss). With
+--profile-stage it also dumps cProfile stats for one stage, or for the slowest one with 'hottest'
+(profiling adds overhead, so take timings from a run without it).
+
+Usage:
+    python benchmarks/bench_training.py --sizes 100000 1000000 10000000 --output training.json
+    python benchmarks/bench_training.py --sizes 100000 --profile-stage bakeoff --profile-dir profiles
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import cProfile
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+STAGES = ['ingest', 'transform', 'bakeoff', 'tune', 'ensemble']
+
+
+def generate_dataset(reference_csv, n_rows, out_path, chunk_size=1_000_000, seed=42):
+    """ Write `n_rows` synthetic rows with the reference schema to `out_path`, chunk by chunk. """
+    reference = pd.read_csv(reference_csv)
+    rng = np.random.default_rng(seed)
+    numeric = ['carat', 'depth', 'table', 'x', 'y', 'z']
+    categorical = {col: reference[col].value_counts(normalize=True) for col in ['cut', 'color', 'clarity']}
+    ref_numeric = reference[numeric].to_numpy()
+    ref_price = reference['price'].to_numpy()
+
+    written = 0
+    while written < n_rows:
+        n = min(chunk_size, n_rows - written)
+        rows = rng.integers(0, len(reference), size=n)
+        values = ref_numeric[rows] * rng.normal(1.0, 0.01, size=(n, len(numeric)))
+        chunk = pd.DataFrame(np.round(values, 2), columns=numeric)
+        for col, freq in categorical.items():
+            chunk[col] = rng.choice(freq.index.to_numpy(), size=n, p=freq.to_numpy())
+        chunk['price'] = np.round(ref_price[rows] * rng.normal(1.0, 0.03, size=n)).astype(int)
+        chunk.insert(0, 'id', np.arange(written, written + n))
+        chunk = chunk[reference.columns]
+        chunk.to_csv(out_path, index=False, header=written == 0, mode='w' if written == 0 else 'a')
+        written += n
+
+
+class PeakRSSSampler:
+    """ Samples this process' RSS plus its children's every `interval` seconds. """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _rss_bytes(pid) -> int:
+        try:
+            with open(f'/proc/{pid}/statm') as file_obj:
+                return int(file_obj.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            return 0
+
+    def _tree_rss(self) -> int:
+        total = self._rss_bytes(os.getpid())
+        try:
+            with open(f'/proc/{os.getpid()}/task/{os.getpid()}/children') as file_obj:
+                total += sum(self._rss_bytes(pid) for pid in file_obj.read().split())
+        except OSError:
+            pass
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self._tree_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_bytes = self._tree_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if not os.path.exists('/proc/self/statm'):
+            self.peak_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run_size(source_csv, profile_stage=None, profile_path=None) -> dict:
+    """ Run every stage once in the current working directory and measure it. """
+    from src.components.data_ingestion import DataIngestion
+    from src.components.data_transformation import DataTransformation
+    from src.components.model_trainer import ModelTrainer
+
+    ingestion = DataIngestion()
+    ingestion.ingestion_config.source_data_path = source_csv
+    transformation = DataTransformation()
+    trainer = ModelTrainer()
+    state = {}
+
+    def ingest():
+        state['paths'] = ingestion.initate_data_ingestion()
+
+    def transform():
+        state['train'], state['test'], _ = transformation.initate_data_transformation(*state['paths'])
+
+    def bakeoff():
+        trainer.run_bakeoff(state['train'], state['test'])
+
+    def tune():
+        state['tuned'] = trainer.tune_models(state['train'])
+
+    def ensemble():
+        trainer.fit_ensemble(state['tuned'], state['train'], state['test'])
+
+    results = {}
+    for name, stage in zip(STAGES, [ingest, transform, bakeoff, tune, ensemble]):
+        profiler = cProfile.Profile() if profile_stage in (name, 'hottest') else None
+        cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+        with PeakRSSSampler() as sampler:
+            if profiler is not None:
+                profiler.enable()
+            stage()
+            if profiler is not None:
+                profiler.disable()
+        results[name] = {
+            'wall_seconds': time.perf_counter() - wall_start,
+            'cpu_seconds': cpu_seconds() - cpu_start,
+            'peak_rss_mb': sampler.peak_bytes / 2**20,
+        }
+        if profiler is not None:
+            results[name]['profiler'] = profiler
+        print(f"  {name}: {results[name]['wall_seconds']:.1f}s wall, {results[name]['cpu_seconds']:.1f}s CPU, "
+              f"{results[name]['peak_rss_mb']:.0f} MB peak RSS", flush=True)
+
+    profiled = [name for name in STAGES if 'profiler' in results[name]]
+    if profiled:
+        hottest = max(profiled, key=lambda name: results[name]['wall_seconds'])
+        results[hottest]['profiler'].dump_stats(profile_path)
+        results[hottest]['profile'] = profile_path
+        for name in profiled:
+            del results[name]['profiler']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reference', default=os.path.join(ROOT, 'artifacts', 'test.csv'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--profile-stage', choices=STAGES + ['hottest'], default=None,
+                        help="Capture cProfile output for this stage, or for the slowest one with 'hottest'")
+    parser.add_argument('--profile-dir', default='.')
+    parser.add_argument('--keep-data', action='store_true', help='Keep the scratch directories')
+    parser.add_argument('--output', default=None, help='Write the results as JSON to this file')
+    # Internal: run a single size in this process
+    parser.add_argument('--_worker', nargs=2, metavar=('SOURCE_CSV', 'RESULT_JSON'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._worker:
+        source_csv, result_json = args._worker
+        profile_path = os.path.join(args.profile_dir, f'{os.path.basename(os.getcwd())}.prof')
+        with open(result_json, 'w') as file_obj:
+            json.dump(run_size(source_csv, args.profile_stage, profile_path), file_obj)
+        return
+
+    report = {'created_at': time.time(), 'cpu_count': os.cpu_count(), 'sizes': {}}
+    for n_rows in args.sizes:
+        work_dir = tempfile.mkdtemp(prefix=f'gem_bench_{n_rows}_')
+        try:
+            source_csv = os.path.join(work_dir, 'gemstone.csv')
+            start = time.perf_counter()
+            generate_dataset(args.reference, n_rows, source_csv)
+            print(f'{n_rows} rows generated in {time.perf_counter() - start:.1f}s ({work_dir})', flush=True)
+
+            result_json = os.path.join(work_dir, 'result.json')
+            os.makedirs(args.profile_dir, exist_ok=True)
+            command = [sys.executable, os.path.abspath(__file__), '--_worker', source_csv, result_json,
+                       '--profile-dir', os.path.abspath(args.profile_dir)]
+            if args.profile_stage:
+                command += ['--profile-stage', args.profile_stage]
+            env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+            subprocess.run(command, cwd=work_dir, env=env, check=True)
+
+            with open(result_json) as file_obj:
+                stages = json.load(file_obj)
+            report['sizes'][str(n_rows)] = {
+                'stages': stages,
+                'total_wall_seconds': sum(stage['wall_seconds'] for stage in stages.values()),
+                'peak_rss_mb': max(stage['peak_rss_mb'] for stage in stages.values()),
+            }
+        finally:
+            if not args.keep_data:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as file_obj:
+            json.dump(report, file_obj, indent=2)
+
+
+if __name__ == '__main__':
+    main()
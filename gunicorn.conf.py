@@ -0,0 +1,89 @@
+"""
+Multi-process launcher for the Flask application (used by the Procfile on Elastic Beanstalk).
+
+The app is imported and the model artifacts are loaded once in the master (`preload_app`), then
+the master's heap is moved to the permanent GC generation before forking. Workers therefore
+start with the model already in memory and share its pages copy-on-write; without the freeze,
+the first collection in each worker would touch every object header and copy those pages.
+
+Per-process and total RSS/PSS are logged every GUNICORN_MEMORY_REPORT_INTERVAL seconds and
+written to GUNICORN_MEMORY_REPORT_PATH, and each worker reports its own usage on /metrics.
+
+    gunicorn --config gunicorn.conf.py application:application
+"""
+import os
+import gc
+import json
+import threading
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+preload_app = True
+
+# With INFERENCE_POOL=1 every gunicorn worker runs its own pool of model processes; keep the total
+# at one model process per core instead of cores x cores
+if os.environ.get('INFERENCE_POOL', '0') == '1':
+    cpu_count = os.cpu_count() or 1
+    os.environ.setdefault('INFERENCE_POOL_WORKERS', str(max(1, cpu_count // workers)))
+    pool_workers = int(os.environ['INFERENCE_POOL_WORKERS'])
+    if workers * pool_workers > cpu_count:
+        raise RuntimeError(
+            f'{workers} gunicorn workers x {pool_workers} inference pool workers oversubscribe {cpu_count} cores; '
+            f'lower GUNICORN_WORKERS or INFERENCE_POOL_WORKERS (e.g. {max(1, cpu_count // workers)})')
+
+memory_report_interval = float(os.environ.get('GUNICORN_MEMORY_REPORT_INTERVAL', 60))
+memory_report_path = os.environ.get('GUNICORN_MEMORY_REPORT_PATH', os.path.join('logs', 'memory_report.json'))
+
+
+def _report_memory(server):
+    from src.memory import memory_report
+
+    report = memory_report(os.getpid(), list(server.WORKERS.keys()))
+    total = report['total']
+    server.log.info('Memory: %d workers, total RSS %.1f MB, total PSS %.1f MB, master RSS %.1f MB',
+                    report['workers'], total['rss_kb'] / 1024, total['pss_kb'] / 1024,
+                    report['processes']['master'].get('rss_kb', 0) / 1024)
+    os.makedirs(os.path.dirname(memory_report_path) or '.', exist_ok=True)
+    with open(memory_report_path, 'w') as file_obj:
+        json.dump(report, file_obj, indent=2)
+
+
+def _memory_reporter(server):
+    stop = threading.Event()
+    while not stop.wait(memory_report_interval):
+        try:
+            _report_memory(server)
+        except Exception as e:
+            server.log.warning('Memory report failed: %s', e)
+
+
+def when_ready(server):
+    """ Runs in the master after the app is imported and before the first worker is forked. """
+    from src.pipeline.model_registry import model_registry
+
+    # The app started a background warm-up; finish loading here so workers (and the inference pool
+    # processes they fork) inherit the model instead of each loading a copy
+    try:
+        model_registry.load()
+    except Exception as e:
+        # Boot anyway: workers load lazily, /health answers 503 and the registry keeps retrying
+        server.log.error('Model preload failed, workers will load it themselves: %s', e)
+    else:
+        gc.collect()
+        gc.freeze()
+        server.log.info('Model version %s preloaded; %d objects frozen before fork',
+                        model_registry.version, gc.get_freeze_count())
+
+    if memory_report_interval > 0:
+        threading.Thread(target=_memory_reporter, args=(server,), name='memory-report', daemon=True).start()
+
+
+def post_fork(server, worker):
+    """ Runs in each worker after fork; retries a model load the master could not complete. """
+    from src.pipeline.model_registry import model_registry
+
+    # The inference pool's own processes load the model in pool mode
+    if os.environ.get('INFERENCE_POOL', '0') != '1' and not model_registry.is_ready():
+        model_registry.warm(background=True)
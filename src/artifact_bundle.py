@@ -0,0 +1,268 @@
+"""
+Versioned, memory-mappable alternative to dill-pickling the whole VotingRegressor.
+
+Layout under the bundle directory:
+
+    manifest.json              points at the current version and lists every file with its sha256
+    <version>/cbr.cbm          CatBoost member in CatBoost's native format
+    <version>/xgb.ubj          XGBoost member in XGBoost's native (UBJSON) format
+    <version>/knn_*.npy        KD-tree arrays of the KNN member, memory-mapped copy-on-write
+    <version>/knn_meta.pkl     the KNN member's small non-array state
+    <version>/preprocessor.*   fitted preprocessor pickle and its compiled JSON export
+
+Each save writes a fresh version directory and then atomically replaces the manifest, so
+workers that still memory-map the previous version are never handed half-written files.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_object, load_object
+
+BUNDLE_FORMAT = 'gemstone-model-bundle'
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+
+def _sha256(file_path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file_obj:
+        for block in iter(lambda: file_obj.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _member_kind(estimator) -> str:
+    module = type(estimator).__module__
+    name = type(estimator).__name__
+    if module.startswith('catboost'):
+        return 'catboost'
+    if module.startswith('xgboost'):
+        return 'xgboost'
+    if name == 'IndexedKNNRegressor':
+        return 'indexed_knn'
+    return 'pickle'
+
+
+def _save_member(name, estimator, version_dir) -> dict:
+    kind = _member_kind(estimator)
+    entry = {'name': name, 'kind': kind, 'files': []}
+
+    if kind == 'catboost':
+        file_name = f'{name}.cbm'
+        estimator.save_model(os.path.join(version_dir, file_name), format='cbm')
+        entry['files'].append(file_name)
+
+    elif kind == 'xgboost':
+        file_name = f'{name}.ubj'
+        estimator.save_model(os.path.join(version_dir, file_name))
+        entry['files'].append(file_name)
+
+    elif kind == 'indexed_knn':
+        estimator._ensure_index()
+        # Arrays of the KD-tree state become .npy files; everything else goes into a small pickle
+        state = estimator.tree_.__getstate__()
+        layout, meta = [], {}
+        for position, item in enumerate(state):
+            if isinstance(item, np.ndarray):
+                file_name = f'{name}_tree_{position}.npy'
+                np.save(os.path.join(version_dir, file_name), np.ascontiguousarray(item))
+                layout.append({'npy': file_name})
+                entry['files'].append(file_name)
+            else:
+                layout.append({'meta': position})
+                meta[position] = item
+        y_file = f'{name}_y.npy'
+        np.save(os.path.join(version_dir, y_file), np.ascontiguousarray(estimator.y_))
+        meta_file = f'{name}_meta.pkl'
+        save_object(os.path.join(version_dir, meta_file), {'params': estimator.get_params(), 'tree_meta': meta,
+                                                            'n_features_in': estimator.n_features_in_})
+        entry['files'] += [y_file, meta_file]
+        entry['tree_layout'] = layout
+
+    else:
+        file_name = f'{name}.pkl'
+        save_object(os.path.join(version_dir, file_name), estimator)
+        entry['files'].append(file_name)
+
+    return entry
+
+
+def _load_member(entry, version_dir, mmap_mode, rebuild_tree=False):
+    def path(file_name):
+        return os.path.join(version_dir, file_name)
+    kind = entry['kind']
+
+    if kind == 'catboost':
+        from catboost import CatBoostRegressor
+        estimator = CatBoostRegressor()
+        estimator.load_model(path(entry['files'][0]), format='cbm')
+        return estimator
+
+    if kind == 'xgboost':
+        from xgboost import XGBRegressor
+        estimator = XGBRegressor()
+        estimator.load_model(path(entry['files'][0]))
+        return estimator
+
+    if kind == 'indexed_knn':
+        from sklearn.neighbors import KDTree
+        from src.components.indexed_knn import IndexedKNNRegressor
+
+        meta = load_object(path(f"{entry['name']}_meta.pkl"))
+        params = dict(meta['params'], index_path=None)
+        if rebuild_tree:
+            # The first state array is always the reference data the tree was built on
+            data = np.load(path(entry['tree_layout'][0]['npy']))
+            tree = KDTree(data, leaf_size=params['leaf_size'])
+        else:
+            state = []
+            for item in entry['tree_layout']:
+                if 'npy' in item:
+                    state.append(np.load(path(item['npy']), mmap_mode=mmap_mode))
+                else:
+                    state.append(meta['tree_meta'][item['meta']])
+            tree = KDTree.__new__(KDTree)
+            tree.__setstate__(tuple(state))
+
+        estimator = IndexedKNNRegressor(**params)
+        estimator.tree_ = tree
+        estimator.y_ = np.load(path(f"{entry['name']}_y.npy"), mmap_mode=mmap_mode)
+        estimator.n_features_in_ = meta['n_features_in']
+        return estimator
+
+    return load_object(path(entry['files'][0]))
+
+
+def save_model_bundle(bundle_dir, model, preprocessor_path, compiled_preprocessor_path=None, keep_versions=2):
+    """
+    Write `model` and the preprocessor as a new bundle version and publish it.
+
+    Args:
+        bundle_dir (str): Bundle root directory, e.g. artifacts/model_bundle.
+        model: Fitted VotingRegressor (members are stored natively) or any other estimator (pickled).
+        preprocessor_path (str): Path of the fitted preprocessor pickle to include.
+        compiled_preprocessor_path (str): Optional path of the compiled preprocessor JSON to include.
+        keep_versions (int): Number of version directories to keep, including the new one.
+
+    Returns:
+        str: The new bundle version.
+    """
+    try:
+        from sklearn.ensemble import VotingRegressor
+        import sklearn
+
+        version = time.strftime('%Y%m%d%H%M%S') + f'-{os.getpid()}'
+        version_dir = os.path.join(bundle_dir, version)
+        os.makedirs(version_dir, exist_ok=True)
+
+        if isinstance(model, VotingRegressor):
+            members = [_save_member(name, est, version_dir)
+                       for (name, _), est in zip(model.estimators, model.estimators_)]
+            ensemble = {'type': 'VotingRegressor', 'weights': model.weights,
+                        'n_features_in': int(model.n_features_in_), 'members': members}
+        else:
+            ensemble = {'type': 'single', 'members': [_save_member('model', model, version_dir)]}
+
+        extra_files = {'preprocessor': os.path.basename(preprocessor_path)}
+        shutil.copy2(preprocessor_path, version_dir)
+        if compiled_preprocessor_path and os.path.exists(compiled_preprocessor_path):
+            shutil.copy2(compiled_preprocessor_path, version_dir)
+            extra_files['compiled_preprocessor'] = os.path.basename(compiled_preprocessor_path)
+
+        files = sorted(os.listdir(version_dir))
+        manifest = {
+            'format': BUNDLE_FORMAT,
+            'format_version': BUNDLE_FORMAT_VERSION,
+            'version': version,
+            'created_at': time.time(),
+            'sklearn_version': sklearn.__version__,
+            'ensemble': ensemble,
+            **extra_files,
+            'sha256': {file_name: _sha256(os.path.join(version_dir, file_name)) for file_name in files},
+        }
+
+        manifest_tmp = os.path.join(bundle_dir, MANIFEST_FILE + '.tmp')
+        with open(manifest_tmp, 'w') as file_obj:
+            json.dump(manifest, file_obj, indent=2)
+        os.replace(manifest_tmp, os.path.join(bundle_dir, MANIFEST_FILE))
+        logging.info('Model bundle version %s published to %s', version, bundle_dir)
+
+        versions = sorted(d for d in os.listdir(bundle_dir) if os.path.isdir(os.path.join(bundle_dir, d)))
+        for old_version in versions[:-keep_versions]:
+            shutil.rmtree(os.path.join(bundle_dir, old_version), ignore_errors=True)
+
+        return version
+
+    except Exception as e:
+        logging.error('Failed to save model bundle to %s: %s', bundle_dir, str(e))
+        raise CustomException(e, sys)
+
+
+def read_manifest(bundle_dir) -> dict:
+    with open(os.path.join(bundle_dir, MANIFEST_FILE)) as file_obj:
+        manifest = json.load(file_obj)
+    if manifest.get('format') != BUNDLE_FORMAT or manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format')} v{manifest.get('format_version')}")
+    return manifest
+
+
+def load_model_bundle(bundle_dir, mmap_mode='c', verify=False):
+    """
+    Load the current bundle version.
+
+    Args:
+        bundle_dir (str): Bundle root directory.
+        mmap_mode (str): Passed to np.load for the KNN arrays. The default copy-on-write mapping shares
+            clean pages between processes; None reads them into private memory.
+        verify (bool): Check every file against the sha256 recorded in the manifest.
+
+    Returns:
+        tuple: (preprocessor, model, manifest).
+    """
+    try:
+        from sklearn.ensemble import VotingRegressor
+        from sklearn.utils import Bunch
+        import sklearn
+
+        manifest = read_manifest(bundle_dir)
+        version_dir = os.path.join(bundle_dir, manifest['version'])
+
+        if verify:
+            for file_name, expected in manifest['sha256'].items():
+                if _sha256(os.path.join(version_dir, file_name)) != expected:
+                    raise ValueError(f'Checksum mismatch for {file_name} in bundle {manifest["version"]}')
+
+        # KD-tree state layout is private to scikit-learn; rebuild the tree rather than trust it
+        rebuild_tree = manifest['sklearn_version'] != sklearn.__version__
+        if rebuild_tree:
+            logging.warning('Bundle written with scikit-learn %s, running %s; rebuilding KNN index',
+                            manifest['sklearn_version'], sklearn.__version__)
+
+        ensemble = manifest['ensemble']
+        members = [(entry['name'], _load_member(entry, version_dir, mmap_mode, rebuild_tree))
+                   for entry in ensemble['members']]
+
+        if ensemble['type'] == 'VotingRegressor':
+            model = VotingRegressor(estimators=members, weights=ensemble['weights'])
+            model.estimators_ = [est for _, est in members]
+            model.named_estimators_ = Bunch(**dict(members))
+            # n_features_in_ is a read-only property delegating to the fitted members
+        else:
+            model = members[0][1]
+
+        preprocessor = load_object(os.path.join(version_dir, manifest['preprocessor']))
+        logging.info('Model bundle version %s loaded from %s', manifest['version'], bundle_dir)
+        return preprocessor, model, manifest
+
+    except Exception as e:
+        logging.error('Failed to load model bundle from %s: %s', bundle_dir, str(e))
+        raise CustomException(e, sys)
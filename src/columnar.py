@@ -0,0 +1,190 @@
+"""
+Typed columnar storage for the train/test splits.
+
+A dataset is a directory holding one raw little-endian binary file per column plus a
+`schema.json` sidecar with the row count, each column's dtype and, for categorical columns,
+the category list their int16 codes refer to (-1 marks a missing value). Columns are read back
+with np.memmap, so loading does no parsing and no type inference, and a writer can append
+chunk after chunk without knowing the final size.
+"""
+
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+
+SCHEMA_FILE = 'schema.json'
+COLUMNAR_FORMAT_VERSION = 1
+
+
+def columnar_path(csv_path) -> str:
+    """ Directory used for the columnar copy of a CSV artifact, e.g. artifacts/train.csv -> artifacts/train. """
+    return os.path.splitext(csv_path)[0]
+
+
+def is_columnar(path) -> bool:
+    return os.path.isfile(os.path.join(path, SCHEMA_FILE))
+
+
+class ColumnarWriter:
+    """
+    Appends DataFrame chunks to a columnar dataset directory; the schema is written on close.
+
+    With `append=True` an existing dataset is extended in place: its column layout and category
+    lists are reused and new chunks are converted to the stored dtypes. The appended rows become
+    visible atomically when close() replaces the schema; until then readers see the previous rows.
+    """
+
+    def __init__(self, dir_path, append=False):
+        self.dir_path = dir_path
+        self.n_rows = 0
+        self._columns = None
+        self._categories = {}
+        self._files = {}
+        if append and is_columnar(dir_path):
+            self._reopen()
+
+    def _reopen(self):
+        # The existing schema stays in place until close() replaces it, so readers keep seeing the
+        # last complete dataset: column files are only read up to its row count
+        schema = read_schema(self.dir_path)
+        self.n_rows = schema['n_rows']
+        self._columns = schema['columns']
+        for column in self._columns:
+            if 'categories' in column:
+                self._categories[column['name']] = column.pop('categories')
+            file_obj = open(os.path.join(self.dir_path, column['file']), 'r+b')
+            # Drop rows an interrupted append wrote past the committed row count
+            file_obj.truncate(self.n_rows * np.dtype(column['dtype']).itemsize)
+            file_obj.seek(0, os.SEEK_END)
+            self._files[column['name']] = file_obj
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(write_schema=exc_type is None)
+
+    def _open(self, df):
+        os.makedirs(self.dir_path, exist_ok=True)
+        # Drop a stale schema first so a half-written dataset is never mistaken for a complete one
+        schema_path = os.path.join(self.dir_path, SCHEMA_FILE)
+        if os.path.exists(schema_path):
+            os.remove(schema_path)
+        self._columns = []
+        for name in df.columns:
+            series = df[name]
+            # Strings may arrive as object, pandas' `string` dtype (the default for text on pandas 3) or categories
+            if (isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(series)
+                    or pd.api.types.is_object_dtype(series)):
+                self._categories[name] = []
+                dtype = 'int16'
+            else:
+                dtype = np.dtype(series.dtype).newbyteorder('<').str
+            self._columns.append({'name': name, 'dtype': dtype, 'file': f'{name}.bin'})
+            self._files[name] = open(os.path.join(self.dir_path, f'{name}.bin'), 'wb')
+
+    def _encode(self, name, series) -> np.ndarray:
+        categories = self._categories[name]
+        values = series.astype('category')
+        # Map this chunk's categories onto the dataset-wide category list
+        lookup = {category: index for index, category in enumerate(categories)}
+        for category in values.cat.categories:
+            if category not in lookup:
+                lookup[category] = len(categories)
+                categories.append(category)
+        remap = np.array([lookup[c] for c in values.cat.categories] + [-1], dtype=np.int16)
+        return remap[values.cat.codes.to_numpy()]
+
+    def append(self, df):
+        """ Append a chunk; it must have the same columns, in the same order, as the first one. """
+        if self._columns is None:
+            self._open(df)
+        for column in self._columns:
+            name = column['name']
+            if name in self._categories:
+                values = self._encode(name, df[name])
+            else:
+                values = df[name].to_numpy(dtype=np.dtype(column['dtype']))
+            np.ascontiguousarray(values).tofile(self._files[name])
+        self.n_rows += len(df)
+
+    def close(self, write_schema=True):
+        for file_obj in self._files.values():
+            file_obj.close()
+        self._files = {}
+        if not write_schema or self._columns is None:
+            return
+        for column in self._columns:
+            if column['name'] in self._categories:
+                column['categories'] = [str(c) for c in self._categories[column['name']]]
+        schema = {'format_version': COLUMNAR_FORMAT_VERSION, 'n_rows': self.n_rows, 'columns': self._columns}
+        schema_path = os.path.join(self.dir_path, SCHEMA_FILE)
+        with open(schema_path + '.tmp', 'w') as file_obj:
+            json.dump(schema, file_obj, indent=2)
+        os.replace(schema_path + '.tmp', schema_path)
+
+
+def save_columnar(df, dir_path):
+    """ Write a whole DataFrame as a columnar dataset. """
+    try:
+        with ColumnarWriter(dir_path) as writer:
+            writer.append(df)
+        logging.info('Columnar dataset with %d rows saved to %s', len(df), dir_path)
+    except Exception as e:
+        logging.error('Failed to save columnar dataset to %s: %s', dir_path, str(e))
+        raise CustomException(e, sys)
+
+
+def read_schema(dir_path) -> dict:
+    with open(os.path.join(dir_path, SCHEMA_FILE)) as file_obj:
+        schema = json.load(file_obj)
+    if schema.get('format_version') != COLUMNAR_FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version {schema.get('format_version')}")
+    return schema
+
+
+def load_column(dir_path, column, n_rows, mmap=True) -> np.ndarray:
+    path = os.path.join(dir_path, column['file'])
+    if mmap and n_rows:
+        return np.memmap(path, dtype=np.dtype(column['dtype']), mode='r', shape=(n_rows,))
+    return np.fromfile(path, dtype=np.dtype(column['dtype']), count=n_rows)
+
+
+def load_columnar(dir_path, columns=None, mmap=True) -> pd.DataFrame:
+    """
+    Load a columnar dataset as a DataFrame with categorical columns restored.
+
+    Args:
+        dir_path (str): Dataset directory.
+        columns (list): Optional subset of columns to load.
+        mmap (bool): Memory-map the column files instead of reading them.
+    """
+    try:
+        schema = read_schema(dir_path)
+        n_rows = schema['n_rows']
+        data = {}
+        for column in schema['columns']:
+            if columns is not None and column['name'] not in columns:
+                continue
+            values = load_column(dir_path, column, n_rows, mmap=mmap)
+            if 'categories' in column:
+                data[column['name']] = pd.Categorical.from_codes(values, categories=column['categories'])
+            else:
+                data[column['name']] = values
+        return pd.DataFrame(data)
+    except Exception as e:
+        logging.error('Failed to load columnar dataset from %s: %s', dir_path, str(e))
+        raise CustomException(e, sys)
+
+
+def load_split(path) -> pd.DataFrame:
+    """ Load a train/test split from either its columnar directory or a CSV file. """
+    if is_columnar(path):
+        return load_columnar(path)
+    return pd.read_csv(path)
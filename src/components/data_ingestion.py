@@ -1,6 +1,7 @@
 # Import all the required libraries
 import os
 import sys
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from dataclasses import dataclass
@@ -8,8 +9,7 @@ from dataclasses import dataclass
 # Importing custom exceptions, logging, and other components
 from src.exception import CustomException
 from src.logger import logging
-from src.components.data_transformation import DataTransformation, DataTransformationConfig
-from src.components.model_trainer import ModelTrainer, ModelTrainerConfig
+from src.columnar import ColumnarWriter, columnar_path, save_columnar
 
 # Initialize Data Ingestion Configuration using dataclass for type hinting and cleaner initialization
 @dataclass
@@ -18,6 +18,23 @@ class DataIngestionConfig:
     train_data_path: str = os.path.join('artifacts', 'train.csv')
     test_data_path: str = os.path.join('artifacts', 'test.csv')
     raw_data_path: str = os.path.join('artifacts', 'data.csv')
+    source_data_path: str = os.path.join('notebook', 'data', 'gemstone.csv')
+    test_size: float = 0.2
+    # Streaming mode reads the source in chunks and splits rows by a hash of their id
+    streaming: bool = os.environ.get('INGESTION_STREAMING', '0') == '1'
+    chunk_size: int = int(os.environ.get('INGESTION_CHUNK_SIZE', 200000))
+    # Splits are exchanged in the columnar format; CSV copies are written only on request
+    export_csv: bool = os.environ.get('INGESTION_EXPORT_CSV', '0') == '1'
+
+
+# Explicit dtypes for streamed reads, so chunks neither re-infer types nor widen floats
+SOURCE_DTYPES = {
+    'id': 'int64',
+    'carat': 'float32', 'depth': 'float32', 'table': 'float32',
+    'x': 'float32', 'y': 'float32', 'z': 'float32',
+    'cut': 'category', 'color': 'category', 'clarity': 'category',
+    'price': 'float64',
+}
 
 
 class DataIngestion:
@@ -32,49 +49,109 @@ class DataIngestion:
         Reads data, splits it, and saves train & test data to specified paths.
 
         Returns:
-            tuple: Paths of the saved train and test datasets.
+            tuple: Paths of the saved (columnar) train and test datasets.
         """
         logging.info('Data ingestion method Started')
 
+        if self.ingestion_config.streaming:
+            return self.initate_streaming_data_ingestion()
+
         try:
             # Read data from the specified path
-            df = pd.read_csv('notebook/data/gemstone.csv')
+            df = pd.read_csv(self.ingestion_config.source_data_path)
             logging.info('Dataset read as pandas Dataframe')
 
             # Save raw data to the configured path
             os.makedirs(os.path.dirname(self.ingestion_config.raw_data_path), exist_ok=True)
-            df.to_csv(self.ingestion_config.raw_data_path, index=False)
+            self.save_split(df, self.ingestion_config.raw_data_path)
             logging.info('Raw data saved to %s', self.ingestion_config.raw_data_path)
 
             # Splitting the data into training and testing sets
             logging.info('Train Test Split Initiated')
-            train_set, test_set = train_test_split(df, test_size=0.2, random_state=42)
+            train_set, test_set = train_test_split(df, test_size=self.ingestion_config.test_size, random_state=42)
 
             # Save the train and test data to their respective paths
-            train_set.to_csv(self.ingestion_config.train_data_path, index=False, header=True)
-            test_set.to_csv(self.ingestion_config.test_data_path, index=False, header=True)
+            self.save_split(train_set, self.ingestion_config.train_data_path)
+            self.save_split(test_set, self.ingestion_config.test_data_path)
             logging.info('Train data saved to %s and Test data saved to %s', self.ingestion_config.train_data_path, self.ingestion_config.test_data_path)
 
             logging.info('Ingestion of Data is completed')
-            return (self.ingestion_config.train_data_path, self.ingestion_config.test_data_path)
+            return self.split_paths()
 
         except Exception as e:
             logging.error('Exception occured at Data Ingestion stage: %s', str(e))
             raise CustomException(e, sys)
 
+    def save_split(self, df, csv_path):
+        """ Write a split in the columnar format next to `csv_path`, plus the CSV itself if exporting. """
+        save_columnar(df, columnar_path(csv_path))
+        if self.ingestion_config.export_csv:
+            df.to_csv(csv_path, index=False, header=True)
+
+    def split_paths(self) -> tuple:
+        """ Columnar train and test dataset directories consumed by DataTransformation. """
+        return (columnar_path(self.ingestion_config.train_data_path), columnar_path(self.ingestion_config.test_data_path))
+
+    def is_test_row(self, ids) -> np.ndarray:
+        """
+        Deterministic train/test assignment: a row is in the test set when a stable hash of its
+        id falls in the lowest `test_size` fraction of buckets. Independent of row order and chunking.
+        """
+        buckets = pd.util.hash_array(np.asarray(ids, dtype=np.int64)) % np.uint64(10000)
+        return buckets < np.uint64(round(self.ingestion_config.test_size * 10000))
+
+    def initate_streaming_data_ingestion(self) -> tuple:
+        """
+        Reads the source in chunks with explicit dtypes and streams the raw copy, train and test
+        rows to disk without holding the dataset in memory.
+
+        Returns:
+            tuple: Paths of the saved train and test datasets.
+        """
+        logging.info('Streaming data ingestion started with chunks of %d rows', self.ingestion_config.chunk_size)
+
+        try:
+            os.makedirs(os.path.dirname(self.ingestion_config.raw_data_path), exist_ok=True)
+            outputs = (
+                self.ingestion_config.raw_data_path,
+                self.ingestion_config.train_data_path,
+                self.ingestion_config.test_data_path,
+            )
+            counts = {path: 0 for path in outputs}
+            writers = {path: ColumnarWriter(columnar_path(path)) for path in outputs}
+
+            reader = pd.read_csv(
+                self.ingestion_config.source_data_path,
+                dtype=SOURCE_DTYPES,
+                chunksize=self.ingestion_config.chunk_size
+            )
+            for chunk_number, chunk in enumerate(reader):
+                test_mask = self.is_test_row(chunk['id'])
+                parts = (chunk, chunk[~test_mask], chunk[test_mask])
+                for path, part in zip(outputs, parts):
+                    writers[path].append(part)
+                    if self.ingestion_config.export_csv:
+                        # The first chunk truncates the file and writes the header; later ones append
+                        part.to_csv(path, index=False, header=chunk_number == 0, mode='w' if chunk_number == 0 else 'a')
+                    counts[path] += len(part)
+
+            for writer in writers.values():
+                writer.close()
+
+            logging.info('Streamed %d rows: %d train, %d test',
+                         counts[outputs[0]], counts[outputs[1]], counts[outputs[2]])
+            logging.info('Ingestion of Data is completed')
+            return self.split_paths()
+
+        except Exception as e:
+            logging.error('Exception occured at Streaming Data Ingestion stage: %s', str(e))
+            raise CustomException(e, sys)
+
 
 # Main driver of the script
 if __name__ == '__main__':
-    # Start Data Ingestion
-    obj = DataIngestion()
-    train_data, test_data = obj.initate_data_ingestion()
-
-    # Start Data Transformation
-    data_transformation = DataTransformation()
-    train_arr, test_arr, _ = data_transformation.initate_data_transformation(train_data, test_data)
-    logging.info('Data Transformation completed successfully')
-
-    # Start Model Training
-    modeltrainer = ModelTrainer()
-    modeltrainer.initiate_model_training(train_arr, test_arr)
+    # Run every stage through the cached training pipeline, so unchanged stages are skipped
+    from src.pipeline.train_pipeline import TrainPipeline
+
+    TrainPipeline().run()
     logging.info('Model training completed successfully')
@@ -2,7 +2,6 @@ import sys
 from dataclasses import dataclass
 
 import numpy as np 
-import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
@@ -13,11 +12,22 @@ from src.logger import logging
 import os
 
 from src.utils import save_object
+from src.columnar import load_split
+from src.dataset import FeatureTargetSet
+from src.pipeline.compiled_preprocessor import CompiledPreprocessor
+from src.schema import CUT_CATEGORIES, COLOR_CATEGORIES, CLARITY_CATEGORIES
 
 @dataclass
 class DataTransformationConfig:
     """ Configuration for Data Transformation including paths for objects and files. """
     preprocessor_obj_file_path = os.path.join('artifacts','preprocessor.pkl')
+    compiled_preprocessor_file_path = os.path.join('artifacts','preprocessor.json')
+    # Feature matrix dtype handed to training ('float64' or 'float32')
+    feature_dtype = os.environ.get('TRANSFORM_FEATURE_DTYPE', 'float64')
+    # Back the transformed sets with .npy memory maps under dataset_dir instead of RAM
+    mmap_datasets = os.environ.get('TRANSFORM_MMAP_DATASETS', '0') == '1'
+    dataset_dir = os.path.join('artifacts','datasets')
+    transform_chunk_size = int(os.environ.get('TRANSFORM_CHUNK_SIZE', 100000))
 
 
 class DataTransformation:
@@ -39,10 +49,10 @@ class DataTransformation:
             categorical_cols = ['cut', 'color','clarity']
             numerical_cols = ['carat', 'depth','table', 'x', 'y', 'z']
 
-            # Define custom ranking for each ordinal variable
-            cut_categories = ['Fair', 'Good', 'Very Good','Premium','Ideal']
-            color_categories = ['D', 'E', 'F', 'G', 'H', 'I', 'J']
-            clarity_categories = ['I1','SI2','SI1','VS2','VS1','VVS2','VVS1','IF']
+            # Define custom ranking for each ordinal variable (shared with the request schema)
+            cut_categories = CUT_CATEGORIES
+            color_categories = COLOR_CATEGORIES
+            clarity_categories = CLARITY_CATEGORIES
 
             # Set up pipeline for numerical features
             num_pipeline = Pipeline(
@@ -79,21 +89,23 @@ class DataTransformation:
             logging.error('Exception occured in Data Transformation Phase: %s', str(e))
             raise CustomException(e, sys)
         
-    def initate_data_transformation(self, train_path, test_path) -> tuple:
+    def initate_data_transformation(self, train_path, test_path, save=True) -> tuple:
         """ 
         Handles the process of transforming training and test datasets.
 
         Args:
-            train_path (str): Path to the training dataset.
-            test_path (str): Path to the test dataset.
+            train_path (str): Path to the training dataset (columnar directory or CSV).
+            test_path (str): Path to the test dataset (columnar directory or CSV).
+            save (bool): Persist the fitted preprocessor; with False the caller saves
+                `self.preprocessor_` via save_preprocessor.
 
         Returns:
-            tuple: Transformed train array, test array and path to saved preprocessor object.
+            tuple: Transformed train FeatureTargetSet, test FeatureTargetSet and path to saved preprocessor object.
         """
         try:
             # Read train and test data
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
+            train_df = load_split(train_path)
+            test_df = load_split(test_path)
 
             logging.info('Successfully read train and test data.')
             logging.info(f'Train Dataframe Head : \n{train_df.head().to_string()}')
@@ -116,26 +128,65 @@ class DataTransformation:
 
             logging.info("Applying preprocessing object on training and testing datasets.")
             
-            # Transform train and test datasets
-            input_feature_train_arr = preprocessing_obj.fit_transform(input_feature_train_df)
-            input_feature_test_arr = preprocessing_obj.transform(input_feature_test_df)
+            # Fit on the training features, then transform both splits chunk by chunk straight
+            # into their preallocated feature matrices; features and target are never concatenated
+            preprocessing_obj.fit(input_feature_train_df)
+            train_set = self.transform_to_dataset(preprocessing_obj, input_feature_train_df, target_feature_train_df, 'train')
+            test_set = self.transform_to_dataset(preprocessing_obj, input_feature_test_df, target_feature_test_df, 'test')
 
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
-            
-            # Save the transformation object for future use
-            save_object(
-                file_path=self.data_transformation_config.preprocessor_obj_file_path,
-                obj=preprocessing_obj
-            )
-            logging.info('Successfully saved preprocessor pickle file.')
+            self.preprocessor_ = preprocessing_obj
+            if save:
+                self.save_preprocessor(preprocessing_obj)
 
             return (
-                train_arr,
-                test_arr,
+                train_set,
+                test_set,
                 self.data_transformation_config.preprocessor_obj_file_path,
             )
         
         except Exception as e:
             logging.error('Exception occured in initiate_data_transformation function: %s', str(e))
             raise CustomException(e, sys)
+
+    def save_preprocessor(self, preprocessing_obj):
+        """ Save the fitted preprocessor pickle and its compiled export. """
+        # Save the transformation object for future use
+        save_object(
+            file_path=self.data_transformation_config.preprocessor_obj_file_path,
+            obj=preprocessing_obj
+        )
+        logging.info('Successfully saved preprocessor pickle file.')
+
+        # Export the fitted statistics for the pandas-free serving path
+        CompiledPreprocessor.from_column_transformer(preprocessing_obj).save(
+            self.data_transformation_config.compiled_preprocessor_file_path
+        )
+
+    def transform_to_dataset(self, preprocessing_obj, input_feature_df, target_feature_df, name) -> FeatureTargetSet:
+        """
+        Transform a split into a FeatureTargetSet with the configured dtype and storage.
+
+        Args:
+            preprocessing_obj (ColumnTransformer): Fitted preprocessor.
+            input_feature_df (pd.DataFrame): Raw input features.
+            target_feature_df (pd.Series): Target values.
+            name (str): Split name, used for the memory-mapped file names.
+
+        Returns:
+            FeatureTargetSet: C-contiguous features and a separate float64 target.
+        """
+        config = self.data_transformation_config
+        n_features = len(preprocessing_obj.get_feature_names_out())
+        dataset = FeatureTargetSet.allocate(
+            len(input_feature_df), n_features,
+            dtype=np.dtype(config.feature_dtype),
+            mmap_dir=config.dataset_dir if config.mmap_datasets else None,
+            name=name
+        )
+        for start in range(0, len(input_feature_df), config.transform_chunk_size):
+            stop = start + config.transform_chunk_size
+            dataset.features[start:stop] = preprocessing_obj.transform(input_feature_df.iloc[start:stop])
+        dataset.target[:] = target_feature_df.to_numpy(dtype=np.float64)
+        dataset.flush()
+        logging.info('%s set transformed: %d rows x %d features (%s)', name, dataset.n_rows, n_features, config.feature_dtype)
+        return dataset
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import math
+import time
+
+import numpy as np
+from catboost import CatBoostRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import ParameterSampler, train_test_split
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+class BudgetedCatBoostSearch:
+    """
+    Successive-halving search for CatBoost with early stopping and a wall-clock budget.
+
+    Every candidate starts with `min_iterations` boosting rounds on a fixed validation split
+    and is early-stopped when the validation loss stops improving. After each rung only the best
+    1/`eta` of the candidates survive and get `eta` times more rounds, up to the largest iteration
+    count in the search space. Candidates are fitted one at a time with `thread_count` CatBoost
+    threads, so the outer search and the booster never compete for cores. When the budget runs out
+    the best configuration seen so far wins.
+
+    After `fit`, `best_params_`, `best_score_` (validation R2), `best_estimator_` (unfitted, with
+    the early-stopped iteration count) and `trace_` are available, mirroring RandomizedSearchCV.
+    """
+
+    def __init__(self, param_distributions, n_candidates=27, min_iterations=100, eta=3,
+                 early_stopping_rounds=50, time_budget=900.0, thread_count=None,
+                 validation_size=0.2, random_state=42):
+        self.param_distributions = param_distributions
+        self.n_candidates = n_candidates
+        self.min_iterations = min_iterations
+        self.eta = eta
+        self.early_stopping_rounds = early_stopping_rounds
+        self.time_budget = time_budget
+        self.thread_count = thread_count or os.cpu_count() or 1
+        self.validation_size = validation_size
+        self.random_state = random_state
+
+    def _fit_candidate(self, params, iterations, xtrain, ytrain, xval, yval):
+        model = CatBoostRegressor(
+            **params,
+            iterations=iterations,
+            thread_count=self.thread_count,
+            random_seed=self.random_state,
+            verbose=False
+        )
+        model.fit(xtrain, ytrain, eval_set=(xval, yval),
+                  early_stopping_rounds=self.early_stopping_rounds, use_best_model=True)
+        return model, r2_score(yval, model.predict(xval))
+
+    def fit(self, X, y):
+        try:
+            start = time.perf_counter()
+            deadline = start + self.time_budget
+
+            distributions = dict(self.param_distributions)
+            max_iterations = max(distributions.pop('iterations', [1000]))
+            candidates = list(ParameterSampler(distributions, n_iter=self.n_candidates, random_state=self.random_state))
+            xtrain, xval, ytrain, yval = train_test_split(
+                X, y, test_size=self.validation_size, random_state=self.random_state
+            )
+
+            self.trace_ = []
+            scored = []
+            iterations = self.min_iterations
+            rung = 0
+            out_of_budget = False
+            while candidates and not out_of_budget:
+                rung_scores = []
+                for params in candidates:
+                    if time.perf_counter() > deadline:
+                        out_of_budget = True
+                        break
+                    fit_start = time.perf_counter()
+                    model, score = self._fit_candidate(params, iterations, xtrain, ytrain, xval, yval)
+                    best_iteration = model.get_best_iteration()
+                    used_iterations = (best_iteration + 1) if best_iteration is not None else iterations
+                    record = {
+                        'rung': rung,
+                        'params': params,
+                        'iterations': iterations,
+                        'best_iteration': used_iterations,
+                        'val_r2': score,
+                        'seconds': time.perf_counter() - fit_start,
+                        'elapsed': time.perf_counter() - start,
+                    }
+                    self.trace_.append(record)
+                    rung_scores.append((score, params, used_iterations))
+                    logging.info('CatBoost search rung %d: %s, %d/%d iterations, val R2 %.5f (%.1fs)',
+                                 rung, params, used_iterations, iterations, score, record['seconds'])
+
+                scored.extend(rung_scores)
+                if iterations >= max_iterations or len(rung_scores) <= 1:
+                    break
+                rung_scores.sort(key=lambda item: item[0], reverse=True)
+                n_keep = max(1, math.ceil(len(rung_scores) / self.eta))
+                candidates = [params for _, params, _ in rung_scores[:n_keep]]
+                iterations = min(max_iterations, iterations * self.eta)
+                rung += 1
+
+            if not scored:
+                raise ValueError(f'No CatBoost candidate finished within the {self.time_budget}s budget')
+
+            # Each score is a real validation score for its (params, early-stopped iterations) pair
+            best_score, best_params, best_iterations = max(scored, key=lambda item: item[0])
+            self.best_params_ = dict(best_params, iterations=best_iterations)
+            self.best_score_ = best_score
+            self.best_estimator_ = CatBoostRegressor(
+                **self.best_params_, thread_count=self.thread_count, random_seed=self.random_state, verbose=False
+            )
+            self.elapsed_ = time.perf_counter() - start
+            logging.info('CatBoost search finished in %.1fs after %d fits%s; best %s, val R2 %.5f',
+                         self.elapsed_, len(self.trace_), ' (budget exhausted)' if out_of_budget else '',
+                         self.best_params_, self.best_score_)
+            return self
+
+        except Exception as e:
+            logging.error('Exception occured during budgeted CatBoost search: %s', str(e))
+            raise CustomException(e, sys)
+
+    def save_trace(self, file_path):
+        """ Write the per-fit search trace as JSON for comparison with other search strategies. """
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file_obj:
+            json.dump({
+                'strategy': 'successive_halving',
+                'time_budget': self.time_budget,
+                'thread_count': self.thread_count,
+                'elapsed': self.elapsed_,
+                'best_params': self.best_params_,
+                'best_score': self.best_score_,
+                'fits': self.trace_,
+            }, file_obj, indent=2, default=lambda value: value.item() if isinstance(value, np.generic) else str(value))
@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import joblib
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.neighbors import KDTree
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Guards the lazy, one-time attach of memory-mapped indexes
+_INDEX_LOCK = threading.Lock()
+
+
+class IndexedKNNRegressor(RegressorMixin, BaseEstimator):
+    """
+    K-nearest-neighbours regressor backed by a prebuilt KD-tree that can live outside the model pickle.
+
+    Predictions equal those of `KNeighborsRegressor(n_neighbors, weights='uniform')`. When
+    `index_path` is set, `save_index` writes the tree and the training targets with joblib and the
+    model pickle no longer carries them; they are memory-mapped on first predict, so
+    several workers on one host share the same pages.
+
+    Approximate mode keeps a deterministic subsample (`sample_fraction`) of the reference set,
+    which shrinks the index and query time. `ModelTrainer` only keeps an approximate index if the
+    ensemble predictions stay within its configured tolerance of the exact one.
+    """
+
+    def __init__(self, n_neighbors=5, leaf_size=30, index_path=None, sample_fraction=1.0, random_state=42):
+        self.n_neighbors = n_neighbors
+        self.leaf_size = leaf_size
+        self.index_path = index_path
+        self.sample_fraction = sample_fraction
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if self.sample_fraction < 1.0:
+            rng = np.random.default_rng(self.random_state)
+            n_keep = max(self.n_neighbors, int(len(X) * self.sample_fraction))
+            keep = np.sort(rng.choice(len(X), size=n_keep, replace=False))
+            X, y = X[keep], y[keep]
+        self.tree_ = KDTree(X, leaf_size=self.leaf_size)
+        self.y_ = y
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def save_index(self, index_path=None):
+        """ Persist the KD-tree and targets to `index_path` so they can be memory-mapped at serving time. """
+        try:
+            index_path = index_path or self.index_path
+            os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+            # Serving workers memory-map the current file; write a new one and swap it in atomically
+            tmp_path = f'{index_path}.tmp.{os.getpid()}'
+            try:
+                joblib.dump({'tree': self.tree_, 'y': self.y_}, tmp_path)
+                os.replace(tmp_path, index_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self.index_path = index_path
+            logging.info('KNN index saved to %s', index_path)
+        except Exception as e:
+            logging.error('Failed to save KNN index to %s: %s', index_path, str(e))
+            raise CustomException(e, sys)
+
+    def load_index(self, mmap_mode='c'):
+        """ Attach the persisted index, memory-mapping its arrays copy-on-write (clean pages stay shared). """
+        try:
+            index = joblib.load(self.index_path, mmap_mode=mmap_mode)
+            self.tree_, self.y_ = index['tree'], index['y']
+            logging.info('KNN index memory-mapped from %s', self.index_path)
+        except Exception as e:
+            logging.error('Failed to load KNN index from %s: %s', self.index_path, str(e))
+            raise CustomException(e, sys)
+
+    def _ensure_index(self):
+        if getattr(self, 'tree_', None) is not None:
+            return
+        with _INDEX_LOCK:
+            if getattr(self, 'tree_', None) is None:
+                self.load_index()
+
+    def predict(self, X):
+        self._ensure_index()
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        _, ind = self.tree_.query(X, k=self.n_neighbors, return_distance=True)
+        return np.mean(self.y_[ind], axis=1)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        if self.index_path is not None:
+            # The index is stored next to the model and memory-mapped on demand
+            state.pop('tree_', None)
+            state.pop('y_', None)
+        return state
@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import time
+from dataclasses import dataclass
+
+import dill
+import numpy as np
+from catboost import CatBoostRegressor
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_object, model_metrics
+
+
+@dataclass
+class ModelDistillerConfig:
+    """ Configuration for distilling the Voting Regressor into a single compact student model. """
+    student_model_file_path: str = os.path.join('artifacts', 'model_student.pkl')
+    report_file_path: str = os.path.join('artifacts', 'distillation_report.json')
+    # Run distillation after the ensemble is trained
+    enabled: bool = os.environ.get('DISTILL_STUDENT', '0') == '1'
+    # Augmented samples per training row, labelled by the ensemble alongside the real rows
+    augment_factor: float = float(os.environ.get('DISTILL_AUGMENT_FACTOR', 1.0))
+    # Gaussian noise on the standardized numeric features of augmented samples
+    noise_scale: float = float(os.environ.get('DISTILL_NOISE_SCALE', 0.1))
+    # The preprocessor emits the numeric columns first, then the encoded categorical ones
+    n_numeric_features: int = 6
+    student_depth: int = int(os.environ.get('DISTILL_STUDENT_DEPTH', 6))
+    student_iterations: int = int(os.environ.get('DISTILL_STUDENT_ITERATIONS', 800))
+    student_learning_rate: float = float(os.environ.get('DISTILL_STUDENT_LEARNING_RATE', 0.1))
+    random_state: int = 42
+
+
+class ModelDistiller:
+    """
+    Distills the weighted Voting Regressor into one oblivious-tree CatBoost student.
+
+    The student is fitted on the ensemble's predictions (not the true prices) over the training
+    rows plus augmented rows: numeric features are jittered with Gaussian noise and each
+    categorical feature is taken from another random row, so the student also learns the
+    ensemble's response between and around the observed stones. The student is saved as a
+    drop-in alternative to model.pkl and compared to the ensemble on accuracy, latency and size.
+    """
+
+    def __init__(self, config: ModelDistillerConfig = None):
+        self.distiller_config = config or ModelDistillerConfig()
+
+    def augment(self, features) -> np.ndarray:
+        config = self.distiller_config
+        rng = np.random.default_rng(config.random_state)
+        n_aug = int(len(features) * config.augment_factor)
+        if n_aug == 0:
+            return np.empty((0, features.shape[1]), dtype=features.dtype)
+
+        augmented = np.array(features[rng.integers(0, len(features), size=n_aug)], dtype=np.float64)
+        numeric = slice(0, config.n_numeric_features)
+        augmented[:, numeric] += rng.normal(0.0, config.noise_scale, size=augmented[:, numeric].shape)
+        for col in range(config.n_numeric_features, features.shape[1]):
+            augmented[:, col] = features[rng.integers(0, len(features), size=n_aug), col]
+        return augmented
+
+    @staticmethod
+    def _latency(model, xtest, single_rows=200) -> dict:
+        start = time.perf_counter()
+        model.predict(xtest)
+        batch_seconds = time.perf_counter() - start
+
+        single = []
+        for row in xtest[:single_rows]:
+            start = time.perf_counter()
+            model.predict(row.reshape(1, -1))
+            single.append(time.perf_counter() - start)
+        return {
+            'batch_seconds': batch_seconds,
+            'batch_rows': len(xtest),
+            'single_row_p50_ms': 1000 * float(np.percentile(single, 50)),
+            'single_row_p99_ms': 1000 * float(np.percentile(single, 99)),
+        }
+
+    @staticmethod
+    def artifact_size(model) -> int:
+        """
+        Bytes needed to serve `model`: its pickle plus any index its members keep outside the
+        pickle (the IndexedKNNRegressor KD-tree and targets), so the comparison covers every artifact.
+        """
+        size = len(dill.dumps(model))
+        for member in getattr(model, 'estimators_', [model]):
+            index_path = getattr(member, 'index_path', None)
+            if index_path is None:
+                continue
+            if os.path.exists(index_path):
+                size += os.path.getsize(index_path)
+            else:
+                size += len(dill.dumps({'tree': member.tree_, 'y': member.y_}))
+        return size
+
+    def distill(self, teacher, train_set, test_set) -> dict:
+        """
+        Fit, evaluate and save the student.
+
+        Args:
+        - teacher: Fitted VotingRegressor (or any fitted regressor) to imitate.
+        - train_set: FeatureTargetSet the teacher was trained on.
+        - test_set: FeatureTargetSet used for the accuracy gap and latency comparison.
+
+        Returns:
+        - dict: The distillation report (also written to `report_file_path`).
+        """
+        try:
+            config = self.distiller_config
+            xtrain = np.asarray(train_set.features)
+            xtest, ytest = np.asarray(test_set.features), np.asarray(test_set.target)
+
+            logging.info('Labelling %d training and augmented rows with the ensemble.', len(xtrain))
+            xdistill = np.vstack([xtrain, self.augment(xtrain)])
+            ydistill = teacher.predict(xdistill)
+
+            logging.info('Distillation: fitting the student on %d rows.', len(xdistill))
+            student = CatBoostRegressor(
+                depth=config.student_depth,
+                iterations=config.student_iterations,
+                learning_rate=config.student_learning_rate,
+                random_seed=config.random_state,
+                verbose=False
+            )
+            start = time.perf_counter()
+            student.fit(xdistill, ydistill)
+            fit_seconds = time.perf_counter() - start
+
+            teacher_pred = teacher.predict(xtest)
+            student_pred = student.predict(xtest)
+            teacher_mae, teacher_rmse, teacher_r2 = model_metrics(ytest, teacher_pred)
+            student_mae, student_rmse, student_r2 = model_metrics(ytest, student_pred)
+            _, _, fidelity_r2 = model_metrics(teacher_pred, student_pred)
+            teacher_latency = self._latency(teacher, xtest)
+            student_latency = self._latency(student, xtest)
+
+            report = {
+                'distill_rows': len(xdistill),
+                'fit_seconds': fit_seconds,
+                'teacher': {'mae': teacher_mae, 'rmse': teacher_rmse, 'r2': teacher_r2,
+                            'size_bytes': self.artifact_size(teacher), **teacher_latency},
+                'student': {'mae': student_mae, 'rmse': student_rmse, 'r2': student_r2,
+                            'size_bytes': self.artifact_size(student), **student_latency},
+                'r2_gap': teacher_r2 - student_r2,
+                'fidelity_r2': fidelity_r2,
+                'batch_speedup': teacher_latency['batch_seconds'] / student_latency['batch_seconds'],
+                'single_row_speedup': teacher_latency['single_row_p50_ms'] / student_latency['single_row_p50_ms'],
+            }
+            logging.info('Student R2 %.5f vs ensemble %.5f (gap %.5f), %.1fx faster per batch, %.1fx per row.',
+                         student_r2, teacher_r2, report['r2_gap'], report['batch_speedup'],
+                         report['single_row_speedup'])
+
+            save_object(file_path=config.student_model_file_path, obj=student)
+            with open(config.report_file_path, 'w') as file_obj:
+                json.dump(report, file_obj, indent=2)
+            return report
+
+        except Exception as e:
+            logging.error('Exception occurred during distillation of the ensemble.')
+            raise CustomException(e, sys)
@@ -3,60 +3,108 @@ import numpy as np
 import pandas as pd
 
 # Modelling Libraries
+# Bake-off-only families (trees, linear models) are imported in run_bakeoff
 from sklearn.neighbors import KNeighborsRegressor
-from sklearn.tree import DecisionTreeRegressor
-from sklearn.ensemble import RandomForestRegressor,AdaBoostRegressor, GradientBoostingRegressor
-from sklearn.svm import SVR
-from sklearn.linear_model import LinearRegression, Ridge,Lasso
 from sklearn.model_selection import RandomizedSearchCV, GridSearchCV
 from catboost import CatBoostRegressor
 from xgboost import XGBRegressor
 from sklearn.ensemble import VotingRegressor
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from sklearn.utils import Bunch
 
 # Custom Modules
 from src.exception import CustomException
 from src.logger import logging
 from src.utils import save_object
-from src.utils import evaluate_models
+from src.utils import evaluate_models_detailed
 from src.utils import print_evaluated_results
 from src.utils import model_metrics
+from src.components.indexed_knn import IndexedKNNRegressor
+from src.components.data_transformation import DataTransformationConfig
+from src.artifact_bundle import save_model_bundle
+from src.dataset import FeatureTargetSet
+from src.components.hyperparameter_search import BudgetedCatBoostSearch
+from src.components.model_distiller import ModelDistiller
 
 # Other Utilities
 from dataclasses import dataclass
 import sys
 import os
+import time
 
 @dataclass 
 class ModelTrainerConfig:
     """ Configuration for Model Trainer, specifying the path for the saved model. """
     trained_model_file_path = os.path.join('artifacts','model.pkl')
+    knn_index_file_path = os.path.join('artifacts','knn_index.joblib')
+    model_bundle_dir = os.path.join('artifacts','model_bundle')
+    # Candidates fitted concurrently in the bake-off, and native threads per candidate (None: cores // jobs)
+    bakeoff_n_jobs = int(os.environ.get('BAKEOFF_N_JOBS', -1))
+    bakeoff_threads_per_model = int(os.environ['BAKEOFF_THREADS_PER_MODEL']) if 'BAKEOFF_THREADS_PER_MODEL' in os.environ else None
+    # CatBoost tuning: 'randomized' (5-fold RandomizedSearchCV) or the opt-in 'halving'
+    # (budgeted successive halving with early stopping)
+    catboost_search = os.environ.get('CATBOOST_SEARCH', 'randomized')
+    catboost_search_time_budget = float(os.environ.get('CATBOOST_SEARCH_TIME_BUDGET', 900))
+    catboost_search_threads = int(os.environ.get('CATBOOST_SEARCH_THREADS', os.cpu_count() or 1))
+    catboost_search_trace_path = os.path.join('artifacts','catboost_search_trace.json')
+    # Extra boosting rounds fitted on each incremental delta
+    incremental_boosting_rounds = int(os.environ.get('INCREMENTAL_BOOSTING_ROUNDS', 100))
+    # Approximate KNN keeps a subsample of the reference set if the ensemble stays within tolerance
+    knn_approximate = os.environ.get('KNN_APPROXIMATE', '0') == '1'
+    knn_sample_fraction = float(os.environ.get('KNN_SAMPLE_FRACTION', 0.5))
+    knn_approx_tolerance = float(os.environ.get('KNN_APPROX_TOLERANCE', 0.005))
 
 class ModelTrainer:
     """ Handles the model training, hyperparameter tuning, and model evaluation. """
     def __init__(self):
         self.model_trainer_config = ModelTrainerConfig()
     
-    def initiate_model_training(self, train_array, test_array):
+    def initiate_model_training(self, train_array, test_array, save=True):
         """
         Initiates the training, evaluation, and saving of the best model.
         
         Args:
-        - train_array: Array of training data.
-        - test_array: Array of test data.
+        - train_array: FeatureTargetSet of training data (or a legacy [features | target] array).
+        - test_array: FeatureTargetSet of test data (or a legacy [features | target] array).
+        - save: Persist the ensemble; with False the caller saves `self.ensemble_` via save_ensemble.
 
         Returns:
         - Tuple (mae, rmse, r2) of mean absolute error, root mean squared error, and R^2 score of the final model.
         """
         try:
             logging.info('Splitting Dependent and Independent variables from train and test data.')
-            xtrain, ytrain, xtest, ytest = (
-                train_array[:, :-1],
-                train_array[:, -1],
-                test_array[:, :-1],
-                test_array[:, -1]
-            )
-            
+            train_set = self.as_dataset(train_array)
+            test_set = self.as_dataset(test_array)
+
+            self.run_bakeoff(train_set, test_set)
+            tuned_params = self.tune_models(train_set)
+            metrics = self.fit_ensemble(tuned_params, train_set, test_set, save=save)
+
+            # Optional single-model student served with MODEL_VARIANT=student (DISTILL_STUDENT=1)
+            distiller = ModelDistiller()
+            if distiller.distiller_config.enabled:
+                distiller.distill(self.ensemble_, train_set, test_set)
+            return metrics
+        
+        except Exception as e:
+            logging.error('Exception occurred during Model Training.')
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def as_dataset(array) -> FeatureTargetSet:
+        return array if isinstance(array, FeatureTargetSet) else FeatureTargetSet.from_array(array)
+
+    def run_bakeoff(self, train_set, test_set) -> dict:
+        """
+        Fit and score the candidate model families.
+
+        Returns:
+        - dict: The evaluate_models_detailed report (R2, fit and predict time per model).
+        """
+        try:
+            from sklearn.tree import DecisionTreeRegressor
+            from sklearn.ensemble import RandomForestRegressor, AdaBoostRegressor, GradientBoostingRegressor
+            from sklearn.linear_model import LinearRegression, Ridge, Lasso
+
             # Define models for evaluation
             models = {
                 "Linear Regression": LinearRegression(),
@@ -72,36 +120,51 @@ class ModelTrainer:
             }
 
             # Evaluate each model and retrieve the report
-            model_report: dict = evaluate_models(xtrain, ytrain, xtest, ytest, models)
+            model_report: dict = evaluate_models_detailed(
+                train_set.features, train_set.target, test_set.features, test_set.target, models,
+                n_jobs=self.model_trainer_config.bakeoff_n_jobs,
+                threads_per_model=self.model_trainer_config.bakeoff_threads_per_model
+            )
 
             print(model_report)
             print('\n====================================================================================\n')
             logging.info(f'Model Report: {model_report}')
 
             # Identify the best model based on R^2 score
-            best_model_score = max(sorted(model_report.values()))
-            best_model_name = list(model_report.keys())[list(model_report.values()).index(best_model_score)]
-            best_model = models[best_model_name]
+            best_model_name = max(model_report, key=lambda name: model_report[name]['r2'])
+            best_model_score = model_report[best_model_name]['r2']
 
             if best_model_score < 0.6:
                 logging.warning('Best model has r2 Score less than 60%.')
-                raise CustomException('No Best Model Found')
+                raise ValueError('No Best Model Found')
 
             print(f'Best Model Found, Model Name: {best_model_name}, R2 Score: {best_model_score}')
             print('\n====================================================================================\n')
             logging.info(f'Best Model Found, Model Name: {best_model_name}, R2 Score: {best_model_score}')
+            return model_report
+
+        except Exception as e:
+            logging.error('Exception occurred during the model bake-off.')
+            raise CustomException(e, sys)
+
+    def tune_models(self, train_set) -> dict:
+        """
+        Tune CatBoost and KNN on the training data.
+
+        Returns:
+        - dict: {'cbr': CatBoost parameters, 'knn': KNN parameters}, plain values only.
+        """
+        try:
+            xtrain, ytrain = train_set.features, train_set.target
 
             # Start hyperparameter tuning for CatBoost
             logging.info('Hyperparameter tuning started for CatBoost.')
-            cbr = CatBoostRegressor(verbose=False)
             param_dist = {'depth': [4,5,6,7,8,9, 10],
                           'learning_rate': [0.01,0.02,0.03,0.04],
                           'iterations': [300,400,500,600]}
-            rscv = RandomizedSearchCV(cbr, param_dist, scoring='r2', cv=5, n_jobs=-1)
-            rscv.fit(xtrain, ytrain)
-            best_cbr = rscv.best_estimator_
-            print(f'Best CatBoost Parameters: {rscv.best_params_}')
-            print(f'Best CatBoost Score: {rscv.best_score_}')
+            _, best_params, best_score = self.tune_catboost(xtrain, ytrain, param_dist)
+            print(f'Best CatBoost Parameters: {best_params}')
+            print(f'Best CatBoost Score: {best_score}')
             print('\n====================================================================================\n')
             logging.info('Hyperparameter tuning completed for CatBoost.')
 
@@ -112,26 +175,51 @@ class ModelTrainer:
             param_grid = dict(n_neighbors=k_range)
             grid = GridSearchCV(knn, param_grid, cv=5, scoring='r2', n_jobs=-1)
             grid.fit(xtrain, ytrain)
-            best_knn = grid.best_estimator_
             print(f'Best KNN Parameters: {grid.best_params_}')
             print(f'Best KNN Score: {grid.best_score_}')
             print('\n====================================================================================\n')
             logging.info('Hyperparameter tuning completed for KNN.')
 
+            return {
+                'cbr': {key: getattr(value, 'item', lambda: value)() for key, value in best_params.items()},
+                'knn': {'n_neighbors': int(grid.best_params_['n_neighbors'])},
+            }
+
+        except Exception as e:
+            logging.error('Exception occurred during hyperparameter tuning.')
+            raise CustomException(e, sys)
+
+    def fit_ensemble(self, tuned_params, train_set, test_set, save=True):
+        """
+        Fit the weighted Voting Regressor from tuned parameters, save it (unless `save` is False) and evaluate it.
+
+        Returns:
+        - Tuple (mae, rmse, r2) of the final model on the test data.
+        """
+        try:
+            xtrain, ytrain, xtest, ytest = train_set.features, train_set.target, test_set.features, test_set.target
+            best_cbr = CatBoostRegressor(**tuned_params['cbr'], verbose=False)
+
+            # Serve the tuned KNN from a prebuilt KD-tree index stored next to the model
+            indexed_knn = IndexedKNNRegressor(
+                n_neighbors=tuned_params['knn']['n_neighbors'],
+                index_path=self.model_trainer_config.knn_index_file_path
+            )
+
             # Training a Voting Regressor
             logging.info('Voting Regressor model training started.')
-            er = VotingRegressor([('cbr', best_cbr), ('xgb', XGBRegressor()), ('knn', best_knn)], weights=[3,2,1])
+            er = VotingRegressor([('cbr', best_cbr), ('xgb', XGBRegressor()), ('knn', indexed_knn)], weights=[3,2,1])
             er.fit(xtrain, ytrain)
+            if self.model_trainer_config.knn_approximate:
+                self.approximate_knn_member(er, xtrain, ytrain, xtest)
             print('Final Model Evaluation:')
             print_evaluated_results(xtrain, ytrain, xtest, ytest, er)
             logging.info('Voting Regressor Training Completed.')
 
             # Save the trained Voting Regressor
-            save_object(
-                file_path=self.model_trainer_config.trained_model_file_path,
-                obj=er
-            )
-            logging.info('Model pickle file saved.')
+            if save:
+                self.save_ensemble(er)
+            self.ensemble_ = er
 
             # Evaluate final model on test data
             ytest_pred = er.predict(xtest)
@@ -147,3 +235,151 @@ class ModelTrainer:
             logging.error('Exception occurred during Model Training.')
             raise CustomException(e, sys)
 
+    def save_ensemble(self, er):
+        """
+        Persist a fitted Voting Regressor: the KNN index, the model pickle and the
+        natively serialized, memory-mappable bundle that serving prefers.
+        """
+        er.named_estimators_['knn'].save_index(self.model_trainer_config.knn_index_file_path)
+        save_object(
+            file_path=self.model_trainer_config.trained_model_file_path,
+            obj=er
+        )
+        logging.info('Model pickle file saved.')
+
+        transformation_config = DataTransformationConfig()
+        save_model_bundle(
+            self.model_trainer_config.model_bundle_dir,
+            er,
+            preprocessor_path=transformation_config.preprocessor_obj_file_path,
+            compiled_preprocessor_path=transformation_config.compiled_preprocessor_file_path
+        )
+
+    def initiate_incremental_training(self, er, delta_set, test_set, save=True):
+        """
+        Update a fitted Voting Regressor with a small delta of new rows instead of retraining it.
+
+        CatBoost and XGBoost continue boosting from their current state for
+        `incremental_boosting_rounds` extra rounds fitted on the delta; the KNN member's reference
+        set is extended with the delta rows and its index rebuilt. The bake-off and both searches
+        are skipped and the ensemble weights are kept.
+
+        Args:
+        - er: Fitted VotingRegressor with 'cbr', 'xgb' and 'knn' members.
+        - delta_set: FeatureTargetSet of the new rows, transformed with the existing preprocessor.
+        - test_set: FeatureTargetSet used to report the updated model's metrics.
+        - save: Persist the updated ensemble; with False the caller saves `self.ensemble_` via save_ensemble.
+
+        Returns:
+        - Tuple (mae, rmse, r2) of the updated model on the test set.
+        """
+        try:
+            rounds = self.model_trainer_config.incremental_boosting_rounds
+            xdelta, ydelta = delta_set.features, delta_set.target
+            members = dict(zip([name for name, _ in er.estimators], er.estimators_))
+
+            logging.info(f'Continuing CatBoost for {rounds} rounds on {delta_set.n_rows} new rows.')
+            prev_cbr = members['cbr']
+            cbr_params = prev_cbr.get_all_params()
+            cbr = CatBoostRegressor(
+                iterations=rounds,
+                depth=cbr_params['depth'],
+                learning_rate=cbr_params['learning_rate'],
+                verbose=False
+            )
+            cbr.fit(xdelta, ydelta, init_model=prev_cbr)
+
+            logging.info(f'Continuing XGBoost for {rounds} rounds on {delta_set.n_rows} new rows.')
+            prev_xgb = members['xgb']
+            xgb = XGBRegressor(**dict(prev_xgb.get_params(), n_estimators=rounds))
+            xgb.fit(xdelta, ydelta, xgb_model=prev_xgb.get_booster())
+
+            logging.info('Appending new rows to the KNN reference set.')
+            prev_knn = members['knn']
+            if isinstance(prev_knn, IndexedKNNRegressor):
+                prev_knn._ensure_index()
+                ref_x, ref_y = np.asarray(prev_knn.tree_.get_arrays()[0]), np.asarray(prev_knn.y_)
+            else:
+                ref_x, ref_y = prev_knn._fit_X, prev_knn._y
+            knn = IndexedKNNRegressor(
+                n_neighbors=prev_knn.n_neighbors,
+                index_path=self.model_trainer_config.knn_index_file_path
+            ).fit(np.vstack([ref_x, xdelta]), np.concatenate([ref_y, ydelta]))
+
+            updated = [('cbr', cbr), ('xgb', xgb), ('knn', knn)]
+            er.estimators = updated
+            er.estimators_ = [est for _, est in updated]
+            er.named_estimators_ = Bunch(**dict(updated))
+            if save:
+                self.save_ensemble(er)
+            self.ensemble_ = er
+
+            mae, rmse, r2 = model_metrics(test_set.target, er.predict(test_set.features))
+            logging.info(f'Incremental update completed. Test MAE: {mae}, RMSE: {rmse}, R2: {r2}')
+            return mae, rmse, r2
+
+        except Exception as e:
+            logging.error('Exception occurred during incremental Model Training.')
+            raise CustomException(e, sys)
+
+    def tune_catboost(self, xtrain, ytrain, param_dist):
+        """
+        Tune CatBoost with the configured strategy and a coordinated thread budget.
+
+        'randomized' (the default) keeps the 5-fold RandomizedSearchCV, but splits the threads
+        between the parallel folds and CatBoost instead of letting both use every core.
+        'halving' (CATBOOST_SEARCH=halving) runs BudgetedCatBoostSearch: candidates one at a time
+        with all search threads, early-stopped on a validation split, within
+        `catboost_search_time_budget` seconds.
+
+        Returns:
+        - Tuple (estimator, best_params, best_score).
+        """
+        config = self.model_trainer_config
+        threads = max(1, config.catboost_search_threads)
+
+        if config.catboost_search == 'halving':
+            search = BudgetedCatBoostSearch(param_dist, time_budget=config.catboost_search_time_budget, thread_count=threads)
+            search.fit(xtrain, ytrain)
+            search.save_trace(config.catboost_search_trace_path)
+            return search.best_estimator_, search.best_params_, search.best_score_
+
+        n_jobs = min(5, threads)
+        cbr = CatBoostRegressor(verbose=False, thread_count=max(1, threads // n_jobs))
+        start = time.perf_counter()
+        rscv = RandomizedSearchCV(cbr, param_dist, scoring='r2', cv=5, n_jobs=n_jobs)
+        rscv.fit(xtrain, ytrain)
+        logging.info(f'RandomizedSearchCV for CatBoost took {time.perf_counter() - start:.1f}s: {rscv.cv_results_["params"]}')
+        return rscv.best_estimator_, rscv.best_params_, rscv.best_score_
+
+    def approximate_knn_member(self, er, xtrain, ytrain, xtest):
+        """
+        Swap the fitted ensemble's KNN member for a subsampled index if the ensemble's test
+        predictions move by less than `knn_approx_tolerance` (mean absolute deviation relative
+        to the mean exact prediction). The ensemble weights are left untouched.
+
+        Returns:
+        - bool: True if the approximate member was kept.
+        """
+        knn_position = [name for name, _ in er.estimators].index('knn')
+        exact_knn = er.estimators_[knn_position]
+        exact_pred = er.predict(xtest)
+
+        approx_knn = IndexedKNNRegressor(
+            n_neighbors=exact_knn.n_neighbors,
+            index_path=exact_knn.index_path,
+            sample_fraction=self.model_trainer_config.knn_sample_fraction
+        ).fit(xtrain, ytrain)
+        er.estimators_[knn_position] = approx_knn
+        er.named_estimators_['knn'] = approx_knn
+        approx_pred = er.predict(xtest)
+
+        deviation = np.mean(np.abs(approx_pred - exact_pred)) / np.mean(np.abs(exact_pred))
+        logging.info(f'Approximate KNN (fraction {approx_knn.sample_fraction}) relative deviation: {deviation:.5f}')
+        if deviation > self.model_trainer_config.knn_approx_tolerance:
+            logging.warning('Approximate KNN exceeds tolerance, keeping the exact index.')
+            er.estimators_[knn_position] = exact_knn
+            er.named_estimators_['knn'] = exact_knn
+            return False
+        return True
+
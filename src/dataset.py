@@ -0,0 +1,81 @@
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class FeatureTargetSet:
+    """
+    Transformed features and target of one split, kept as two separate arrays.
+
+    Replaces the `np.c_[features, target]` matrices that were glued together in
+    DataTransformation only to be sliced apart again in ModelTrainer. Features are
+    C-contiguous; both arrays may be np.memmap instances backed by .npy files.
+    """
+    features: np.ndarray
+    target: np.ndarray
+
+    def __post_init__(self):
+        if len(self.features) != len(self.target):
+            raise ValueError(f'{len(self.features)} feature rows but {len(self.target)} targets')
+
+    @property
+    def n_rows(self) -> int:
+        return self.features.shape[0]
+
+    @property
+    def n_features(self) -> int:
+        return self.features.shape[1]
+
+    @classmethod
+    def allocate(cls, n_rows, n_features, dtype=np.float64, mmap_dir=None, name='train'):
+        """
+        Preallocate an empty set, in memory or as writable .npy memory maps under `mmap_dir`.
+        """
+        if mmap_dir is None:
+            return cls(np.empty((n_rows, n_features), dtype=dtype), np.empty(n_rows, dtype=np.float64))
+        os.makedirs(mmap_dir, exist_ok=True)
+        features = np.lib.format.open_memmap(
+            os.path.join(mmap_dir, f'{name}_features.npy'), mode='w+', dtype=dtype, shape=(n_rows, n_features)
+        )
+        target = np.lib.format.open_memmap(
+            os.path.join(mmap_dir, f'{name}_target.npy'), mode='w+', dtype=np.float64, shape=(n_rows,)
+        )
+        return cls(features, target)
+
+    @classmethod
+    def from_array(cls, array):
+        """ Split a legacy `[features | target]` matrix (views only, no copy). """
+        return cls(array[:, :-1], array[:, -1])
+
+    @classmethod
+    def load(cls, mmap_dir, name='train', mmap_mode='r'):
+        """ Open a set previously written by `allocate(..., mmap_dir=...)` or `save`. """
+        try:
+            return cls(
+                np.load(os.path.join(mmap_dir, f'{name}_features.npy'), mmap_mode=mmap_mode),
+                np.load(os.path.join(mmap_dir, f'{name}_target.npy'), mmap_mode=mmap_mode),
+            )
+        except Exception as e:
+            logging.error('Failed to load %s dataset from %s: %s', name, mmap_dir, str(e))
+            raise CustomException(e, sys)
+
+    def save(self, mmap_dir, name='train'):
+        try:
+            os.makedirs(mmap_dir, exist_ok=True)
+            np.save(os.path.join(mmap_dir, f'{name}_features.npy'), self.features)
+            np.save(os.path.join(mmap_dir, f'{name}_target.npy'), self.target)
+        except Exception as e:
+            logging.error('Failed to save %s dataset to %s: %s', name, mmap_dir, str(e))
+            raise CustomException(e, sys)
+
+    def flush(self):
+        """ Flush memory-mapped arrays to disk; a no-op for in-memory sets. """
+        for array in (self.features, self.target):
+            if isinstance(array, np.memmap):
+                array.flush()
@@ -0,0 +1,57 @@
+"""
+Per-process memory accounting from /proc, for judging how much of the model forked workers share.
+
+RSS counts every resident page, including pages still shared copy-on-write with the master, so
+summing worker RSS overstates the real footprint. PSS splits each shared page between the processes
+mapping it, so the PSS of the master plus all workers is the memory the server actually uses; USS
+(private pages) is what one more worker would add.
+"""
+import os
+
+_FIELDS = {
+    'Rss': 'rss_kb',
+    'Pss': 'pss_kb',
+    'Shared_Clean': 'shared_clean_kb',
+    'Shared_Dirty': 'shared_dirty_kb',
+    'Private_Clean': 'private_clean_kb',
+    'Private_Dirty': 'private_dirty_kb',
+}
+
+
+def process_memory(pid='self') -> dict:
+    """
+    Memory of one process in kB, from /proc/<pid>/smaps_rollup (Linux 4.14+).
+
+    Returns:
+        dict: rss_kb, pss_kb, shared/private clean/dirty kB and uss_kb; empty if unavailable.
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as file_obj:
+            lines = file_obj.readlines()
+    except OSError:
+        return {}
+    usage = {}
+    for line in lines:
+        key, _, rest = line.partition(':')
+        if key in _FIELDS:
+            usage[_FIELDS[key]] = int(rest.split()[0])
+    usage['uss_kb'] = usage.get('private_clean_kb', 0) + usage.get('private_dirty_kb', 0)
+    return usage
+
+
+def memory_report(master_pid, worker_pids) -> dict:
+    """ Per-process usage of a master and its workers, plus totals across all of them. """
+    processes = {'master': dict(process_memory(master_pid), pid=master_pid)}
+    for pid in sorted(worker_pids):
+        processes[f'worker_{pid}'] = dict(process_memory(pid), pid=pid)
+    totals = {
+        key: sum(usage.get(key, 0) for usage in processes.values())
+        for key in ('rss_kb', 'pss_kb', 'uss_kb')
+    }
+    return {'processes': processes, 'total': totals, 'workers': len(worker_pids)}
+
+
+def process_memory_metrics() -> dict:
+    """ This process' usage, for the metrics endpoint of each worker. """
+    usage = process_memory(os.getpid())
+    return {key: value for key, value in usage.items() if key in ('rss_kb', 'pss_kb', 'uss_kb', 'shared_clean_kb')}
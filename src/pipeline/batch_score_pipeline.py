@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+from src.columnar import is_columnar, read_schema, load_column
+from src.pipeline.model_registry import model_registry
+from src.pipeline.inference_pool import init_worker
+from src.pipeline.predict_pipeline import PredictPipeline, FEATURE_COLUMNS
+
+
+@dataclass
+class BatchScoreConfig:
+    """ Configuration for offline bulk scoring of inventory files. """
+    chunk_size: int = int(os.environ.get('BATCH_SCORE_CHUNK_SIZE', 100000))
+    workers: int = int(os.environ.get('BATCH_SCORE_WORKERS', os.cpu_count() or 1))
+    # Chunks queued per worker; bounds memory held by pending inputs and results
+    prefetch_per_worker: int = 2
+    id_column: str = 'id'
+
+
+def _read_columnar_chunk(path, start, stop) -> pd.DataFrame:
+    schema = read_schema(path)
+    data = {}
+    for column in schema['columns']:
+        if column['name'] not in FEATURE_COLUMNS and column['name'] != BatchScoreConfig.id_column:
+            continue
+        values = np.asarray(load_column(path, column, schema['n_rows'], mmap=True)[start:stop])
+        if 'categories' in column:
+            values = pd.Categorical.from_codes(values, categories=column['categories'])
+        data[column['name']] = values
+    return pd.DataFrame(data)
+
+
+def _score_chunk(chunk):
+    """ Score one chunk in a worker; columnar chunks arrive as (path, start, stop) and are read there. """
+    if isinstance(chunk, tuple):
+        chunk = _read_columnar_chunk(*chunk)
+    ids = chunk[BatchScoreConfig.id_column].to_numpy() if BatchScoreConfig.id_column in chunk else None
+    preds = PredictPipeline().predict_batch(chunk[FEATURE_COLUMNS])
+    return ids, preds
+
+
+class BatchScorePipeline:
+    """
+    Scores a whole inventory file (CSV or columnar directory) with `PredictPipeline.predict_batch`.
+
+    The input is streamed in chunks of `chunk_size` rows and scored by `workers` processes forked
+    after the model is loaded, so they share it. Columnar inputs are memory-mapped and sliced by the
+    workers themselves; CSV chunks are parsed here and shipped to them. Predictions are appended to
+    the output CSV in input order, and after every chunk a progress file next to the output records
+    how many chunks and bytes are complete. A rerun with the same input and chunk size truncates
+    the output to the last checkpoint and continues from the next chunk.
+    """
+
+    def __init__(self, config: BatchScoreConfig = None):
+        self.config = config or BatchScoreConfig()
+
+    @staticmethod
+    def progress_path(output_path) -> str:
+        return output_path + '.progress.json'
+
+    def _load_progress(self, input_path, output_path) -> dict:
+        try:
+            with open(self.progress_path(output_path)) as file_obj:
+                progress = json.load(file_obj)
+        except (OSError, ValueError):
+            return None
+        if progress.get('input') != os.path.abspath(input_path) or progress.get('chunk_size') != self.config.chunk_size:
+            logging.warning('Progress file %s belongs to another run; starting over', self.progress_path(output_path))
+            return None
+        return progress
+
+    def _save_progress(self, output_path, progress):
+        tmp_path = self.progress_path(output_path) + '.tmp'
+        with open(tmp_path, 'w') as file_obj:
+            json.dump(progress, file_obj)
+        os.replace(tmp_path, self.progress_path(output_path))
+
+    def iter_chunks(self, input_path, skip_chunks=0):
+        chunk_size = self.config.chunk_size
+        if is_columnar(input_path):
+            n_rows = read_schema(input_path)['n_rows']
+            for start in range(skip_chunks * chunk_size, n_rows, chunk_size):
+                yield (input_path, start, min(start + chunk_size, n_rows))
+        else:
+            skiprows = range(1, skip_chunks * chunk_size + 1) if skip_chunks else None
+            yield from pd.read_csv(input_path, chunksize=chunk_size, skiprows=skiprows)
+
+    def run(self, input_path, output_path, resume=True) -> dict:
+        """
+        Args:
+            input_path (str): CSV file or columnar directory with the gemstone feature columns.
+            output_path (str): CSV to write `id,price` rows to (row numbers if the input has no id).
+            resume (bool): Continue from the last checkpoint of an interrupted run.
+
+        Returns:
+            dict: Rows scored, elapsed seconds and rows per second of this run.
+        """
+        try:
+            progress = self._load_progress(input_path, output_path) if resume else None
+            if progress is None:
+                progress = {'input': os.path.abspath(input_path), 'chunk_size': self.config.chunk_size,
+                            'chunks_done': 0, 'rows_done': 0, 'output_bytes': 0}
+            else:
+                logging.info('Resuming %s after %d chunks (%d rows)', input_path,
+                             progress['chunks_done'], progress['rows_done'])
+
+            model_registry.load()
+            method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+            start_rows = progress['rows_done']
+            start = time.perf_counter()
+
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            with open(output_path, 'a+b') as output, ProcessPoolExecutor(
+                    max_workers=self.config.workers, mp_context=multiprocessing.get_context(method),
+                    initializer=init_worker) as pool:
+                # Drop anything written after the last checkpoint
+                output.truncate(progress['output_bytes'])
+                output.seek(progress['output_bytes'])
+                header = progress['output_bytes'] == 0
+
+                pending = deque()
+                max_pending = self.config.workers * self.config.prefetch_per_worker
+                chunks = self.iter_chunks(input_path, progress['chunks_done'])
+                exhausted = False
+                while pending or not exhausted:
+                    while not exhausted and len(pending) < max_pending:
+                        try:
+                            pending.append(pool.submit(_score_chunk, next(chunks)))
+                        except StopIteration:
+                            exhausted = True
+                    if not pending:
+                        break
+
+                    ids, preds = pending.popleft().result()
+                    if ids is None:
+                        ids = np.arange(progress['rows_done'], progress['rows_done'] + len(preds))
+                    frame = pd.DataFrame({self.config.id_column: ids, 'price': np.round(preds, 2)})
+                    output.write(frame.to_csv(index=False, header=header).encode())
+                    output.flush()
+                    os.fsync(output.fileno())
+                    header = False
+
+                    progress['chunks_done'] += 1
+                    progress['rows_done'] += len(preds)
+                    progress['output_bytes'] = output.tell()
+                    self._save_progress(output_path, progress)
+
+                    elapsed = time.perf_counter() - start
+                    logging.info('Scored %d rows (%.0f rows/s)', progress['rows_done'],
+                                 (progress['rows_done'] - start_rows) / elapsed)
+
+            elapsed = time.perf_counter() - start
+            rows = progress['rows_done'] - start_rows
+            summary = {
+                'rows_scored': rows,
+                'rows_total': progress['rows_done'],
+                'seconds': elapsed,
+                'rows_per_second': rows / elapsed if elapsed > 0 else 0.0,
+                'workers': self.config.workers,
+                'chunk_size': self.config.chunk_size,
+                'output': output_path,
+            }
+            logging.info('Batch scoring finished: %s', summary)
+            return summary
+
+        except Exception as e:
+            logging.error('Exception occured in batch scoring pipeline: %s', str(e))
+            raise CustomException(e, sys)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score an inventory CSV or columnar directory in bulk.')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--chunk-size', type=int, default=BatchScoreConfig.chunk_size)
+    parser.add_argument('--workers', type=int, default=BatchScoreConfig.workers)
+    parser.add_argument('--restart', action='store_true', help='Ignore the progress of a previous run')
+    args = parser.parse_args()
+
+    summary = BatchScorePipeline(BatchScoreConfig(chunk_size=args.chunk_size, workers=args.workers)).run(
+        args.input, args.output, resume=not args.restart)
+    print(f"Scored {summary['rows_scored']} rows in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_second']:.0f} rows/s) -> {summary['output']}")
@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+class CompiledPreprocessor:
+    """
+    NumPy re-implementation of the fitted gemstone ColumnTransformer.
+
+    The fitted statistics (imputer medians/modes, ordinal category orders, scaler means/scales)
+    are pulled out of the sklearn pipelines once; `transform` then applies the same float64
+    arithmetic directly, so results match `preprocessor.transform` exactly without building a
+    DataFrame or going through sklearn's input validation on every request.
+
+    Input rows are in `input_columns` order: the numerical columns followed by the categorical ones.
+    """
+
+    def __init__(self, numerical_columns, categorical_columns, num_medians, num_means, num_scales,
+                 cat_modes, cat_categories, cat_means, cat_scales):
+        self.numerical_columns = list(numerical_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.num_medians = np.asarray(num_medians, dtype=np.float64)
+        self.num_means = np.asarray(num_means, dtype=np.float64)
+        self.num_scales = np.asarray(num_scales, dtype=np.float64)
+        self.cat_modes = list(cat_modes)
+        self.cat_categories = [list(categories) for categories in cat_categories]
+        self.cat_means = np.asarray(cat_means, dtype=np.float64)
+        self.cat_scales = np.asarray(cat_scales, dtype=np.float64)
+        self._cat_codes = [
+            {category: float(code) for code, category in enumerate(categories)}
+            for categories in self.cat_categories
+        ]
+
+    @property
+    def input_columns(self) -> list:
+        return self.numerical_columns + self.categorical_columns
+
+    @classmethod
+    def from_column_transformer(cls, preprocessor):
+        """
+        Extract the fitted parameters from the ColumnTransformer built by
+        `DataTransformation.get_data_transformation_object`.
+        """
+        try:
+            columns = {name: cols for name, _, cols in preprocessor.transformers_}
+            num_pipeline = preprocessor.named_transformers_['num_pipeline']
+            cat_pipeline = preprocessor.named_transformers_['cat_pipeline']
+
+            num_scaler = num_pipeline.named_steps['scaler']
+            cat_scaler = cat_pipeline.named_steps['scaler']
+            encoder = cat_pipeline.named_steps['ordinal_encoder']
+
+            return cls(
+                numerical_columns=columns['num_pipeline'],
+                categorical_columns=columns['cat_pipeline'],
+                num_medians=num_pipeline.named_steps['imputer'].statistics_,
+                num_means=num_scaler.mean_,
+                num_scales=num_scaler.scale_,
+                cat_modes=[str(mode) for mode in cat_pipeline.named_steps['imputer'].statistics_],
+                cat_categories=[[str(c) for c in categories] for categories in encoder.categories_],
+                cat_means=cat_scaler.mean_,
+                cat_scales=cat_scaler.scale_,
+            )
+        except Exception as e:
+            logging.error('Failed to compile preprocessor: %s', str(e))
+            raise CustomException(e, sys)
+
+    def transform_arrays(self, numeric, categorical) -> np.ndarray:
+        """
+        Transform pre-split inputs.
+
+        Args:
+            numeric: (n, len(numerical_columns)) float array; NaN marks a missing value.
+            categorical: (n, len(categorical_columns)) array of category strings; None/NaN marks a missing value.
+
+        Returns:
+            np.ndarray: (n, n_features) float64 matrix identical to `preprocessor.transform`.
+        """
+        numeric = np.array(numeric, dtype=np.float64, ndmin=2)
+        missing = np.isnan(numeric)
+        if missing.any():
+            numeric = np.where(missing, self.num_medians, numeric)
+        num_out = (numeric - self.num_means) / self.num_scales
+
+        categorical = np.asarray(categorical, dtype=object)
+        if categorical.ndim == 1:
+            categorical = categorical.reshape(1, -1)
+        codes = np.empty(categorical.shape, dtype=np.float64)
+        for j, mapping in enumerate(self._cat_codes):
+            mode = self.cat_modes[j]
+            for i, value in enumerate(categorical[:, j]):
+                if value is None or value != value:
+                    value = mode
+                try:
+                    codes[i, j] = mapping[value]
+                except KeyError:
+                    raise ValueError(
+                        f"Found unknown category {value!r} in column {self.categorical_columns[j]!r}"
+                    ) from None
+        cat_out = (codes - self.cat_means) / self.cat_scales
+
+        return np.hstack((num_out, cat_out))
+
+    def transform(self, rows) -> np.ndarray:
+        """ Transform rows given in `input_columns` order (a 2-D sequence or object array). """
+        rows = np.asarray(rows, dtype=object)
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+        n_num = len(self.numerical_columns)
+        return self.transform_arrays(rows[:, :n_num].astype(np.float64), rows[:, n_num:])
+
+    def to_dict(self) -> dict:
+        return {
+            'numerical_columns': self.numerical_columns,
+            'categorical_columns': self.categorical_columns,
+            'num_medians': self.num_medians.tolist(),
+            'num_means': self.num_means.tolist(),
+            'num_scales': self.num_scales.tolist(),
+            'cat_modes': self.cat_modes,
+            'cat_categories': self.cat_categories,
+            'cat_means': self.cat_means.tolist(),
+            'cat_scales': self.cat_scales.tolist(),
+        }
+
+    def save(self, file_path):
+        """ Export the fitted parameters as JSON (floats round-trip exactly through repr). """
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'w') as file_obj:
+                json.dump(self.to_dict(), file_obj, indent=2)
+            logging.info('Compiled preprocessor saved to %s', file_path)
+        except Exception as e:
+            logging.error('Failed to save compiled preprocessor to %s: %s', file_path, str(e))
+            raise CustomException(e, sys)
+
+    @classmethod
+    def load(cls, file_path):
+        try:
+            with open(file_path) as file_obj:
+                return cls(**json.load(file_obj))
+        except Exception as e:
+            logging.error('Failed to load compiled preprocessor from %s: %s', file_path, str(e))
+            raise CustomException(e, sys)
@@ -0,0 +1,147 @@
+import os
+import time
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.logger import logging
+from src.metrics import metrics
+
+ENSEMBLE_MEMBER_SECONDS = metrics.histogram(
+    'ensemble_member_predict_seconds', 'Time spent in predict of each ensemble member.', ['member'])
+
+
+def _parse_thread_budgets(spec) -> dict:
+    """ 'cbr=2,xgb=2,knn=1' -> {'cbr': 2, 'xgb': 2, 'knn': 1}. """
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, threads = item.partition('=')
+        budgets[name.strip()] = int(threads)
+    return budgets
+
+
+@dataclass
+class EnsembleExecutorConfig:
+    """ Configuration for predicting the Voting Regressor's members concurrently. """
+    parallel: bool = os.environ.get('ENSEMBLE_PARALLEL', '0') == '1'
+    # Smaller batches run the members one after another; a thread handoff costs more than it saves
+    min_parallel_rows: int = int(os.environ.get('ENSEMBLE_PARALLEL_MIN_ROWS', 256))
+    # Native threads per member, e.g. 'cbr=2,xgb=2,knn=1'; members not listed share the remaining cores
+    member_threads: str = os.environ.get('ENSEMBLE_MEMBER_THREADS', '')
+
+
+class EnsembleExecutor:
+    """
+    Serving-side replacement for `VotingRegressor.predict` with per-member timing.
+
+    Members are predicted in parallel on a small thread pool (CatBoost, XGBoost and the KD-tree
+    query all release the GIL in native code) once a batch has at least `min_parallel_rows` rows,
+    each with its own native thread budget so they do not oversubscribe the cores. Predictions
+    are stacked in the fitted member order and averaged with the same weights and the same
+    `np.average` call as `VotingRegressor.predict`, so results are bit-identical to `er.predict`.
+    Any other estimator (e.g. the distilled student) is predicted and timed as a single member.
+    """
+
+    def __init__(self, config: EnsembleExecutorConfig = None):
+        self.config = config or EnsembleExecutorConfig()
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        # Per loaded ensemble; entries go away with the model object, so reloads do not accumulate
+        self._budgets = weakref.WeakKeyDictionary()
+        self._budgets_lock = threading.Lock()
+
+    def _get_pool(self, n_members) -> ThreadPoolExecutor:
+        # Threads do not survive fork, so a forked worker process starts its own pool
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(max_workers=n_members, thread_name_prefix='ensemble-member')
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def thread_budgets(self, names) -> dict:
+        budgets = _parse_thread_budgets(self.config.member_threads)
+        unlisted = [name for name in names if name not in budgets]
+        if unlisted:
+            # The KD-tree query is single-threaded; the boosters split whatever cores are left
+            spare = max(1, (os.cpu_count() or 1) - sum(budgets.values()))
+            threaded = [name for name in unlisted if name != 'knn']
+            for name in unlisted:
+                budgets[name] = 1 if name == 'knn' else max(1, spare // max(1, len(threaded)))
+        return budgets
+
+    @staticmethod
+    def _members(model) -> list:
+        names = [name for name, est in model.estimators if est != 'drop']
+        return list(zip(names, model.estimators_))
+
+    def prepare(self, model):
+        """
+        Apply the thread budgets to the members that take them as a parameter (XGBoost's n_jobs).
+
+        Called by the model registry once per loaded model, before it serves any prediction, so
+        member parameters are never changed while another thread is predicting with them. Does
+        nothing unless parallel prediction is enabled.
+        """
+        from sklearn.ensemble import VotingRegressor
+
+        if not self.config.parallel or not isinstance(model, VotingRegressor):
+            return None
+        with self._budgets_lock:
+            budgets = self._budgets.get(model)
+            if budgets is None:
+                members = self._members(model)
+                budgets = self.thread_budgets([name for name, _ in members])
+                for name, fitted in members:
+                    if not type(fitted).__module__.startswith('catboost') and 'n_jobs' in fitted.get_params():
+                        fitted.set_params(n_jobs=budgets[name])
+                self._budgets[model] = budgets
+                logging.info('Ensemble member thread budgets: %s', budgets)
+        return budgets
+
+    def _predict_member(self, name, fitted, data, threads):
+        start = time.perf_counter()
+        if type(fitted).__module__.startswith('catboost'):
+            pred = fitted.predict(data, thread_count=threads)
+        else:
+            pred = fitted.predict(data)
+        ENSEMBLE_MEMBER_SECONDS.labels(name).observe(time.perf_counter() - start)
+        return pred
+
+    def predict(self, model, data):
+        """
+        Returns:
+            np.ndarray: `model.predict(data)`, computed member by member.
+        """
+        # Already imported by unpickling the model; deferred so importing this module stays cheap
+        from sklearn.ensemble import VotingRegressor
+
+        if not isinstance(model, VotingRegressor):
+            start = time.perf_counter()
+            pred = model.predict(data)
+            ENSEMBLE_MEMBER_SECONDS.labels(type(model).__name__).observe(time.perf_counter() - start)
+            return pred
+
+        members = self._members(model)
+        weights = None
+        if model.weights is not None:
+            weights = [weight for (_, est), weight in zip(model.estimators, model.weights) if est != 'drop']
+
+        if self.config.parallel and len(data) >= self.config.min_parallel_rows:
+            # Models from the registry were prepared at load time; this only covers ones passed in directly
+            budgets = self._budgets.get(model) or self.prepare(model)
+            pool = self._get_pool(len(members))
+            futures = [pool.submit(self._predict_member, name, fitted, data, budgets[name])
+                       for name, fitted in members]
+            member_preds = [future.result() for future in futures]
+        else:
+            member_preds = [self._predict_member(name, fitted, data, -1) for name, fitted in members]
+        return np.average(np.asarray(member_preds).T, axis=1, weights=weights)
+
+
+# Shared by every PredictPipeline in this process
+ensemble_executor = EnsembleExecutor()
@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object, model_metrics
+from src.columnar import ColumnarWriter, load_split
+from src.dataset import FeatureTargetSet
+from src.artifact_bundle import MANIFEST_FILE, load_model_bundle
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation
+from src.components.model_trainer import ModelTrainer
+
+
+@dataclass
+class IncrementalTrainingConfig:
+    """ Drift thresholds that decide between a warm-start update and a full retrain. """
+    # Largest allowed |mean| of any standardized feature over the delta (0 means no shift)
+    max_feature_mean_shift: float = float(os.environ.get('DRIFT_MAX_FEATURE_MEAN_SHIFT', 0.5))
+    # Largest allowed drop of the current model's R2 on the delta relative to its test R2
+    max_r2_drop: float = float(os.environ.get('DRIFT_MAX_R2_DROP', 0.05))
+    # Content hashes of the deltas already folded into the train split and the model
+    applied_deltas_path: str = os.path.join('artifacts', 'applied_deltas.json')
+
+
+def delta_hash(delta_df) -> str:
+    """ Content hash of a delta's rows, independent of the file format it arrived in. """
+    row_hashes = pd.util.hash_pandas_object(delta_df, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()[:16]
+
+
+class IncrementalTrainPipeline:
+    """
+    Warm-start retraining from a small delta of newly priced stones.
+
+    The delta is transformed with the existing preprocessor. If it has not drifted, the existing
+    ensemble is updated in place by `ModelTrainer.initiate_incremental_training`; otherwise the
+    full transformation + bake-off + tuning + ensemble path reruns on a staged copy of the train
+    split with the delta appended. The delta only becomes part of the persisted train split once
+    the new model is saved, and its content hash is then recorded, so a failed run leaves the
+    split untouched and rerunning an applied delta is a no-op.
+    """
+
+    def __init__(self):
+        self.config = IncrementalTrainingConfig()
+        self.ingestion = DataIngestion()
+        self.transformation = DataTransformation()
+        self.trainer = ModelTrainer()
+
+    def load_current_model(self):
+        """ Current (preprocessor, model), preferring the published bundle over the pickles. """
+        bundle_dir = self.trainer.model_trainer_config.model_bundle_dir
+        if os.path.exists(os.path.join(bundle_dir, MANIFEST_FILE)):
+            preprocessor, model, _ = load_model_bundle(bundle_dir, mmap_mode=None)
+            return preprocessor, model
+        preprocessor = load_object(self.transformation.data_transformation_config.preprocessor_obj_file_path)
+        model = load_object(self.trainer.model_trainer_config.trained_model_file_path)
+        return preprocessor, model
+
+    def to_dataset(self, preprocessor, df, name) -> FeatureTargetSet:
+        return self.transformation.transform_to_dataset(preprocessor, df.drop(columns=['price', 'id']), df['price'], name)
+
+    def load_applied_deltas(self) -> dict:
+        try:
+            with open(self.config.applied_deltas_path) as file_obj:
+                return json.load(file_obj)
+        except (OSError, ValueError):
+            return {}
+
+    def record_applied_delta(self, digest, n_rows, mode):
+        applied = self.load_applied_deltas()
+        applied[digest] = {'rows': n_rows, 'mode': mode, 'applied_at': time.time()}
+        tmp_path = self.config.applied_deltas_path + '.tmp'
+        os.makedirs(os.path.dirname(tmp_path) or '.', exist_ok=True)
+        with open(tmp_path, 'w') as file_obj:
+            json.dump(applied, file_obj, indent=2)
+        os.replace(tmp_path, self.config.applied_deltas_path)
+
+    @staticmethod
+    def stage_train_split(train_path, delta_df) -> str:
+        """ Copy of the train split with the delta appended; the original stays untouched. """
+        staging_path = train_path + '.staging'
+        shutil.rmtree(staging_path, ignore_errors=True)
+        shutil.copytree(train_path, staging_path)
+        with ColumnarWriter(staging_path, append=True) as writer:
+            writer.append(delta_df)
+        logging.info('Delta staged in %s (%d rows)', staging_path, writer.n_rows)
+        return staging_path
+
+    @staticmethod
+    def publish_train_split(staging_path, train_path):
+        previous_path = train_path + '.previous'
+        shutil.rmtree(previous_path, ignore_errors=True)
+        os.rename(train_path, previous_path)
+        os.rename(staging_path, train_path)
+        shutil.rmtree(previous_path)
+
+    def detect_drift(self, model, delta_set, test_set) -> list:
+        """
+        Returns:
+            list: Human-readable reasons the delta is considered drifted (empty if it is not).
+        """
+        reasons = []
+        feature_shift = np.abs(np.asarray(delta_set.features, dtype=np.float64).mean(axis=0))
+        if feature_shift.max() > self.config.max_feature_mean_shift:
+            reasons.append(f'feature {int(feature_shift.argmax())} mean shifted by {feature_shift.max():.3f} std')
+
+        _, _, test_r2 = model_metrics(test_set.target, model.predict(test_set.features))
+        _, _, delta_r2 = model_metrics(delta_set.target, model.predict(delta_set.features))
+        if test_r2 - delta_r2 > self.config.max_r2_drop:
+            reasons.append(f'R2 on delta {delta_r2:.4f} vs {test_r2:.4f} on test')
+        return reasons
+
+    def run(self, delta_path):
+        """
+        Args:
+            delta_path (str): New rows with the gemstone schema (CSV file or columnar directory).
+
+        Returns:
+            tuple: (mode, (mae, rmse, r2)) where mode is 'incremental' or 'full', or
+            ('skipped', None) if this delta was already applied.
+        """
+        try:
+            delta_df = load_split(delta_path)
+            digest = delta_hash(delta_df)
+            if digest in self.load_applied_deltas():
+                logging.warning('Delta %s (%s) was already applied; nothing to do.', delta_path, digest)
+                return 'skipped', None
+            logging.info('Incremental training started with %d new rows from %s', len(delta_df), delta_path)
+
+            train_path, test_path = self.ingestion.split_paths()
+            preprocessor, model = self.load_current_model()
+            delta_set = self.to_dataset(preprocessor, delta_df, 'delta')
+            test_set = self.to_dataset(preprocessor, load_split(test_path), 'test')
+
+            # Nothing is written to the served artifacts until the train split and the applied-delta
+            # record are in place; the model bundle is committed last so a crash never pairs a new
+            # model with a split or record that does not include its delta
+            reasons = self.detect_drift(model, delta_set, test_set)
+            if reasons:
+                logging.warning('Drift detected (%s); running a full retrain.', '; '.join(reasons))
+                staging_path = self.stage_train_split(train_path, delta_df)
+                train_set, test_set, _ = self.transformation.initate_data_transformation(
+                    staging_path, test_path, save=False)
+                mode, scores = 'full', self.trainer.initiate_model_training(train_set, test_set, save=False)
+                self.publish_train_split(staging_path, train_path)
+            else:
+                mode, scores = 'incremental', self.trainer.initiate_incremental_training(
+                    model, delta_set, test_set, save=False)
+                with ColumnarWriter(train_path, append=True) as writer:
+                    writer.append(delta_df)
+
+            self.record_applied_delta(digest, len(delta_df), mode)
+            if mode == 'full':
+                self.transformation.save_preprocessor(self.transformation.preprocessor_)
+            self.trainer.save_ensemble(self.trainer.ensemble_)
+            logging.info('Delta %s applied (%s update) and appended to %s', digest, mode, train_path)
+            return mode, scores
+
+        except Exception as e:
+            logging.error('Exception occured in incremental training pipeline: %s', str(e))
+            raise CustomException(e, sys)
+
+
+if __name__ == '__main__':
+    mode, scores = IncrementalTrainPipeline().run(sys.argv[1])
+    if scores is None:
+        print('Delta already applied; nothing to do.')
+    else:
+        mae, rmse, r2 = scores
+        print(f'{mode} update: MAE {mae:.4f}, RMSE {rmse:.4f}, R2 {r2:.4f}')
@@ -0,0 +1,263 @@
+import os
+import sys
+import time
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.metrics import metrics
+from src.pipeline.model_registry import model_registry
+
+POOL_REJECTIONS = metrics.counter(
+    'inference_pool_rejections_total', 'Predictions shed by the inference pool.', ['reason'])
+
+
+@dataclass
+class InferencePoolConfig:
+    """ Configuration for running model work in a pool of preloaded worker processes. """
+    enabled: bool = os.environ.get('INFERENCE_POOL', '0') == '1'
+    # gunicorn.conf.py lowers the default to cores // gunicorn workers
+    workers: int = int(os.environ.get('INFERENCE_POOL_WORKERS', os.cpu_count() or 1))
+    # Submitted but unfinished predictions allowed before new ones are shed with 429
+    max_pending: int = int(os.environ.get('INFERENCE_POOL_MAX_PENDING', 64))
+    # Seconds a request waits for its prediction before it is answered with 503, plus
+    # `timeout_per_1k_rows` for every thousand rows of a batch
+    result_timeout: float = float(os.environ.get('INFERENCE_POOL_TIMEOUT', 10.0))
+    timeout_per_1k_rows: float = float(os.environ.get('INFERENCE_POOL_TIMEOUT_PER_1K_ROWS', 1.0))
+    retry_after: int = int(os.environ.get('INFERENCE_POOL_RETRY_AFTER', 1))
+
+
+class InferenceRejectedError(Exception):
+    """ A prediction was shed; `status_code` is 429 (queue full) or 503 (pool unavailable or too slow). """
+
+    def __init__(self, message, status_code, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def init_worker():
+    """ Process-pool initializer shared by the inference pool and the batch scorer. """
+    # Workers forked from a process that already holds the model share it; others load their own copy
+    if not model_registry.is_ready():
+        model_registry.load()
+
+
+def _worker_version():
+    # get() also applies the registry's stale check, so workers pick up new artifacts
+    model_registry.get()
+    return model_registry.version
+
+
+def _predict_rows(rows):
+    from src.pipeline.predict_pipeline import PredictPipeline
+    preds = PredictPipeline().predict_rows(rows)
+    return model_registry.version, preds
+
+
+def _predict_batch(features, chunk_size, deadline):
+    from src.pipeline.predict_pipeline import PredictPipeline
+    pipeline = PredictPipeline()
+    chunk_size = chunk_size or pipeline.config.batch_chunk_size
+    preds = np.empty(len(features), dtype=np.float64)
+    for start in range(0, len(features), chunk_size):
+        # The caller has already answered 503 past its deadline; stop instead of finishing unseen work
+        if time.time() > deadline:
+            raise TimeoutError(f'batch abandoned after {start} of {len(features)} rows')
+        chunk = features.iloc[start:start + chunk_size]
+        preds[start:start + len(chunk)] = pipeline.predict_batch(chunk, chunk_size=chunk_size)
+    return model_registry.version, preds
+
+
+class InferencePool:
+    """
+    CPU-bound model work off the request threads, with bounded admission.
+
+    Request threads keep doing parsing, validation and JSON encoding; predictions run in
+    `workers` processes that own the model: they load it (or inherit it copy-on-write when the
+    process forking them already holds it, e.g. from the gunicorn master) and apply reloads. The
+    request process never loads the model itself; it only tracks the version the workers report,
+    for the prediction cache and the health check.
+
+    At most `max_pending` predictions may be queued or running: beyond that requests are rejected
+    immediately with 429 rather than piling up. A request whose prediction takes longer than
+    `result_timeout` (plus `timeout_per_1k_rows` per thousand batch rows) gets 503; queued work is
+    cancelled, and a running batch stops at its next chunk. When disabled, predictions run inline
+    in the request thread exactly as before.
+    """
+
+    def __init__(self, config: InferencePoolConfig = None, registry=None):
+        self.config = config or InferencePoolConfig()
+        self.registry = registry or model_registry
+        self._executor = None
+        self._executor_pid = None
+        self._start_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.config.max_pending)
+        self._pending_lock = threading.Lock()
+        self._pending = 0
+        self._abandoned = 0
+        self._version = None
+        self._warming = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def start(self):
+        """ Create the worker pool; the workers are forked and load the model on first use. """
+        with self._start_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                return
+            try:
+                # fork shares an already loaded model with the workers; other platforms fall back to spawn
+                method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.config.workers,
+                    mp_context=multiprocessing.get_context(method),
+                    initializer=init_worker
+                )
+                self._executor_pid = os.getpid()
+                logging.info('Inference pool started with %d workers (max %d pending)',
+                             self.config.workers, self.config.max_pending)
+            except Exception as e:
+                logging.error('Failed to start inference pool: %s', str(e))
+                raise CustomException(e, sys)
+
+    def shutdown(self):
+        with self._start_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _reject(self, reason, status_code, message):
+        POOL_REJECTIONS.labels(reason).inc()
+        raise InferenceRejectedError(message, status_code, self.config.retry_after)
+
+    def _release(self, _future):
+        with self._pending_lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _abandoned_done(self, _future):
+        with self._pending_lock:
+            self._abandoned -= 1
+
+    def timeout_for(self, n_rows) -> float:
+        return self.config.result_timeout + self.config.timeout_per_1k_rows * n_rows / 1000
+
+    def _submit(self, fn, *args):
+        if self._executor is None or self._executor_pid != os.getpid():
+            self.start()
+        if not self._slots.acquire(blocking=False):
+            self._reject('queue_full', 429, f'Server is busy ({self.config.max_pending} predictions pending)')
+        with self._pending_lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._release(None)
+            logging.error('Inference pool is broken, restarting: %s', str(e))
+            self.shutdown()
+            self._reject('pool_broken', 503, 'Inference workers are restarting')
+        future.add_done_callback(self._release)
+        return future
+
+    def _run(self, fn, n_rows, *args):
+        timeout = self.timeout_for(n_rows)
+        future = self._submit(fn, *args)
+        try:
+            version, preds = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if not future.cancel() and not future.done():
+                # Still running; its slot stays taken until it finishes
+                with self._pending_lock:
+                    self._abandoned += 1
+                future.add_done_callback(self._abandoned_done)
+            self._reject('timeout', 503, f'Prediction did not finish within {timeout:.1f}s')
+        except BrokenProcessPool as e:
+            logging.error('Inference worker died, restarting pool: %s', str(e))
+            self.shutdown()
+            self._reject('pool_broken', 503, 'Inference workers are restarting')
+        self._version = version
+        return preds
+
+    def predict_rows(self, rows):
+        """ `PredictPipeline.predict_rows` in a worker process. """
+        return self._run(_predict_rows, len(rows), rows)
+
+    def submit_rows(self, rows) -> Future:
+        """
+        `predict_rows` without blocking: returns a Future resolving to the predictions. Admission
+        is rejected immediately as in `predict_rows`; the caller decides how long to wait.
+        """
+        result = Future()
+
+        def resolve(future):
+            if future.cancelled():
+                result.cancel()
+            elif isinstance(future.exception(), BrokenProcessPool):
+                logging.error('Inference worker died, restarting pool: %s', str(future.exception()))
+                self.shutdown()
+                POOL_REJECTIONS.labels('pool_broken').inc()
+                result.set_exception(InferenceRejectedError(
+                    'Inference workers are restarting', 503, self.config.retry_after))
+            elif future.exception() is not None:
+                result.set_exception(future.exception())
+            else:
+                self._version, preds = future.result()
+                result.set_result(preds)
+
+        self._submit(_predict_rows, rows).add_done_callback(resolve)
+        return result
+
+    def predict_batch(self, features, chunk_size=None):
+        """ `PredictPipeline.predict_batch` in a worker process, stopped once its timeout has passed. """
+        timeout = self.timeout_for(len(features))
+        return self._run(_predict_batch, len(features), features, chunk_size, time.time() + timeout)
+
+    def model_version(self) -> str:
+        """ Version last reported by a worker (or inherited from the forking process), without loading anything. """
+        return self._version or self.registry.version
+
+    def _version_reported(self, future):
+        self._warming = None
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logging.error('Inference workers failed to load the model: %s', str(future.exception()))
+        else:
+            self._version = future.result()
+
+    def status(self) -> dict:
+        """
+        Readiness summary for the health check. Until a version is known, a version probe is sent
+        to the workers (which makes them load the model) and 'loading' is reported.
+        """
+        version = self.model_version()
+        if version is None and self._warming is None:
+            try:
+                self._warming = self._submit(_worker_version)
+                self._warming.add_done_callback(self._version_reported)
+            except InferenceRejectedError:
+                self._warming = None
+        return {
+            'state': 'ready' if version is not None else 'loading',
+            'ready': version is not None,
+            'version': version,
+            'pool_workers': self.config.workers,
+        }
+
+    def metrics(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'workers': self.config.workers,
+            'pending': self._pending,
+            'abandoned': self._abandoned,
+            'max_pending': self.config.max_pending,
+        }
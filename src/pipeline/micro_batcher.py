@@ -0,0 +1,192 @@
+import os
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import CancelledError, Future
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.inference_pool import InferenceRejectedError
+
+
+@dataclass
+class MicroBatcherConfig:
+    """ Configuration for coalescing concurrent single-row predictions into one model call. """
+    enabled: bool = os.environ.get('PREDICT_MICRO_BATCHING', '0') == '1'
+    max_wait_ms: float = float(os.environ.get('PREDICT_MICRO_BATCH_WAIT_MS', 2.0))
+    max_batch_size: int = int(os.environ.get('PREDICT_MICRO_BATCH_MAX_ROWS', 64))
+    result_timeout: float = float(os.environ.get('PREDICT_MICRO_BATCH_TIMEOUT', 30.0))
+
+
+class MicroBatcherStats:
+    """ Counters describing queue depth, batch sizes and how long requests waited to be batched. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_size = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.errors = 0
+
+    def record(self, batch_size, wait_seconds, failed=False):
+        with self._lock:
+            self.batches += 1
+            self.rows += batch_size
+            self.max_batch_size = max(self.max_batch_size, batch_size)
+            self.wait_seconds_total += sum(wait_seconds)
+            self.wait_seconds_max = max(self.wait_seconds_max, max(wait_seconds))
+            if failed:
+                self.errors += 1
+
+    def as_dict(self, queue_depth) -> dict:
+        with self._lock:
+            return {
+                'queue_depth': queue_depth,
+                'batches': self.batches,
+                'rows': self.rows,
+                'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'mean_wait_ms': 1000 * self.wait_seconds_total / self.rows if self.rows else 0.0,
+                'max_wait_ms': 1000 * self.wait_seconds_max,
+                'errors': self.errors,
+            }
+
+
+class MicroBatcher:
+    """
+    Dynamic batching in front of a vectorized predict function.
+
+    Callers submit small feature frames; a single background thread collects whatever arrives
+    within `max_wait_ms` of the first queued request (or until `max_batch_size` rows are queued),
+    runs one prediction for all of them and hands every caller back its own rows. When disabled,
+    `predict` simply calls the wrapped function in the caller's thread.
+
+    With `submit_fn` (a non-blocking variant of `predict_fn` returning a Future, e.g.
+    `InferencePool.submit_rows`) batches are dispatched without waiting for the previous one and
+    callers are resolved from the batch future's callback; up to `max_in_flight` batches run at
+    once, so every pool process can work on its own batch.
+    """
+
+    def __init__(self, predict_fn, config: MicroBatcherConfig = None, submit_fn=None, max_in_flight=1):
+        self.predict_fn = predict_fn
+        self.submit_fn = submit_fn
+        self.max_in_flight = max(1, max_in_flight) if submit_fn is not None else 1
+        self.config = config or MicroBatcherConfig()
+        self.stats = MicroBatcherStats()
+        self._queue = queue.Queue()
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so a forked worker process starts its own
+        if self._worker is not None and self._worker_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._worker is not None and self._worker_pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+            self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def submit(self, features) -> Future:
+        """ Queue a DataFrame or 2-D array of rows and return a Future resolving to their predictions. """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((features, future, time.perf_counter()))
+        return future
+
+    def predict(self, features):
+        """ Predict through the batching queue, or directly when micro-batching is disabled. """
+        if not self.enabled:
+            return self.predict_fn(features)
+        try:
+            return self.submit(features).result(timeout=self.config.result_timeout)
+        except (CustomException, InferenceRejectedError):
+            raise
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _collect(self) -> list:
+        items = [self._queue.get()]
+        rows = len(items[0][0])
+        deadline = time.perf_counter() + self.config.max_wait_ms / 1000.0
+        while rows < self.config.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    @staticmethod
+    def _combine(parts):
+        if isinstance(parts[0], np.ndarray):
+            return np.vstack(parts)
+        import pandas as pd
+        return pd.concat(parts, ignore_index=True)
+
+    def _dispatch(self, features) -> Future:
+        if self.submit_fn is not None:
+            return self.submit_fn(features)
+        batch = Future()
+        batch.set_result(self.predict_fn(features))
+        return batch
+
+    def _run(self):
+        while True:
+            # Requests keep queueing (and form larger batches) while all dispatch slots are busy
+            self._in_flight.acquire()
+            items = self._collect()
+            started = time.perf_counter()
+            waits = [started - enqueued for _, _, enqueued in items]
+            try:
+                batch = self._dispatch(self._combine([features for features, _, _ in items]))
+            except Exception as e:
+                batch = Future()
+                batch.set_exception(e)
+            batch.add_done_callback(lambda batch, items=items, waits=waits: self._resolve(items, waits, batch))
+
+    def _resolve(self, items, waits, batch):
+        self._in_flight.release()
+        n_rows = sum(len(features) for features, _, _ in items)
+        error = batch.exception() if not batch.cancelled() else CancelledError()
+        if error is not None:
+            logging.error('Micro-batch of %d requests failed: %s', len(items), str(error))
+            self.stats.record(n_rows, waits, failed=True)
+            for _, future, _ in items:
+                future.set_exception(error)
+            return
+
+        preds = np.asarray(batch.result())
+        offset = 0
+        for features, future, _ in items:
+            future.set_result(preds[offset:offset + len(features)])
+            offset += len(features)
+        self.stats.record(offset, waits)
+
+    def metrics(self) -> dict:
+        """ Current queue depth plus cumulative batch size and wait time statistics. """
+        metrics = self.stats.as_dict(self._queue.qsize())
+        metrics['enabled'] = self.enabled
+        metrics['max_wait_ms_config'] = self.config.max_wait_ms
+        metrics['max_batch_size_config'] = self.config.max_batch_size
+        metrics['max_in_flight'] = self.max_in_flight
+        return metrics
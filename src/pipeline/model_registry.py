@@ -0,0 +1,290 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.metrics import metrics
+from src.utils import load_object
+from src.artifact_bundle import MANIFEST_FILE, load_model_bundle
+from src.pipeline.compiled_preprocessor import CompiledPreprocessor
+from src.pipeline.ensemble_executor import ensemble_executor
+from src.schema import NUMERICAL_COLUMNS, CATEGORICAL_COLUMNS, NUMERIC_RANGES, CATEGORY_LEVELS
+
+MODEL_LOAD_SECONDS = metrics.histogram(
+    'model_load_seconds', 'Time to load the model artifacts into this worker.',
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+MODEL_WARMUP_SECONDS = metrics.histogram(
+    'model_warmup_seconds', 'Time to run the warmup predictions of a freshly loaded model.',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+MODEL_LOAD_FAILURES = metrics.counter('model_load_failures_total', 'Model artifact loads that raised an exception.')
+
+
+@dataclass
+class ModelRegistryConfig:
+    """ Configuration for the model registry: artifact paths and how often they are checked for changes. """
+    preprocessor_path: str = os.path.join('artifacts', 'preprocessor.pkl')
+    model_path: str = os.path.join('artifacts', 'model.pkl')
+    # Memory-mapped by the KNN member of model.pkl; part of the loaded version when present
+    knn_index_path: str = os.path.join('artifacts', 'knn_index.joblib')
+    # Preferred over the pickles whenever a published bundle manifest exists
+    bundle_dir: str = os.path.join('artifacts', 'model_bundle')
+    # 'ensemble' serves the Voting Regressor; 'student' serves the distilled single model
+    model_variant: str = os.environ.get('MODEL_VARIANT', 'ensemble')
+    student_model_path: str = os.path.join('artifacts', 'model_student.pkl')
+    reload_check_interval: float = float(os.environ.get('MODEL_RELOAD_CHECK_INTERVAL', 5.0))
+    # Rows of the dummy batch predicted after each load, before the version is swapped in; 0 disables
+    warmup_rows: int = int(os.environ.get('MODEL_WARMUP_ROWS', 64))
+
+
+def warmup_features(n_rows) -> tuple:
+    """ Valid dummy features: numerics spread over their ranges, categoricals cycling through every level. """
+    numeric = np.column_stack([np.linspace(*NUMERIC_RANGES[name], num=n_rows) for name in NUMERICAL_COLUMNS])
+    categorical = np.empty((n_rows, len(CATEGORICAL_COLUMNS)), dtype=object)
+    for j, name in enumerate(CATEGORICAL_COLUMNS):
+        levels = CATEGORY_LEVELS[name]
+        categorical[:, j] = [levels[i % len(levels)] for i in range(n_rows)]
+    return numeric, categorical
+
+
+class ModelRegistry:
+    """
+    Process-wide holder of the fitted preprocessor and model.
+
+    Artifacts are unpickled once per worker and shared by every request thread. The files on disk
+    are re-checked at most every `reload_check_interval` seconds; a reload only happens when their
+    mtime/size changed *and* their content hash differs from the loaded version. While a reload is
+    in progress the previous objects keep serving requests. Every freshly loaded version first
+    predicts a dummy batch, so lazy initialisation in the model libraries (CatBoost's model
+    evaluator, XGBoost's predictor, the KD-tree pages) happens before it takes real traffic.
+    """
+
+    STATE_EMPTY = 'empty'
+    STATE_LOADING = 'loading'
+    STATE_READY = 'ready'
+    STATE_FAILED = 'failed'
+
+    def __init__(self, config: ModelRegistryConfig = None):
+        self.config = config or ModelRegistryConfig()
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._ready_event = threading.Event()
+        self._artifacts = None
+        self._signature = None
+        self._version = None
+        self._state = self.STATE_EMPTY
+        self._error = None
+        self._loaded_at = None
+        self._load_seconds = None
+        self._warmup_seconds = None
+        self._last_check = 0.0
+
+    @property
+    def bundle_manifest_path(self) -> str:
+        return os.path.join(self.config.bundle_dir, MANIFEST_FILE)
+
+    def uses_bundle(self) -> bool:
+        return self.config.model_variant != 'student' and os.path.exists(self.bundle_manifest_path)
+
+    @property
+    def model_path(self) -> str:
+        return self.config.student_model_path if self.config.model_variant == 'student' else self.config.model_path
+
+    @property
+    def artifact_paths(self) -> tuple:
+        # The bundle manifest lists every file's sha256, so it alone identifies the version
+        if self.uses_bundle():
+            return (self.bundle_manifest_path,)
+        if self.config.model_variant != 'student' and os.path.exists(self.config.knn_index_path):
+            return (self.config.preprocessor_path, self.model_path, self.config.knn_index_path)
+        return (self.config.preprocessor_path, self.model_path)
+
+    @property
+    def version(self) -> str:
+        """ Content hash of the currently loaded artifacts, or None before the first load. """
+        return self._version
+
+    def is_ready(self) -> bool:
+        return self._state == self.STATE_READY
+
+    def _file_signature(self) -> tuple:
+        signature = []
+        for path in self.artifact_paths:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _content_hash(self) -> str:
+        digest = hashlib.sha256()
+        for path in self.artifact_paths:
+            with open(path, 'rb') as file_obj:
+                for block in iter(lambda: file_obj.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()[:16]
+
+    def warmup(self, preprocessor, model, compiled) -> float:
+        """
+        Run the serving paths once on a dummy batch: the compiled single-row transform with a
+        one-row and a `warmup_rows` predict, and the fitted preprocessor's DataFrame transform.
+
+        Returns:
+            float: Seconds spent, or None when warmup is disabled (MODEL_WARMUP_ROWS=0) and nothing ran.
+        """
+        n_rows = self.config.warmup_rows
+        if n_rows <= 0:
+            return None
+        start = time.perf_counter()
+        numeric, categorical = warmup_features(n_rows)
+        data = compiled.transform_arrays(numeric, categorical)
+        model.predict(data[:1])
+        model.predict(data)
+
+        # Only the DataFrame (batch) path needs pandas; importing it here also moves that cost to load time
+        import pandas as pd
+        frame = pd.DataFrame(numeric, columns=NUMERICAL_COLUMNS)
+        for j, name in enumerate(CATEGORICAL_COLUMNS):
+            frame[name] = categorical[:, j]
+        preprocessor.transform(frame)
+        return time.perf_counter() - start
+
+    def load(self, force: bool = False):
+        """
+        Load (or reload) the artifacts from disk and swap them in atomically.
+
+        Args:
+            force (bool): Reload even if the content hash is unchanged.
+
+        Returns:
+            tuple: The (preprocessor, model) pair now being served.
+        """
+        with self._reload_lock:
+            try:
+                if self._artifacts is None:
+                    self._state = self.STATE_LOADING
+                start = time.perf_counter()
+                signature = self._file_signature()
+                version = self._content_hash()
+
+                if not force and version == self._version:
+                    # Files were touched but their content is identical; keep the loaded objects
+                    self._signature = signature
+                    return self._artifacts[:2]
+
+                logging.info('Loading model artifacts (version %s)', version)
+                if self.uses_bundle():
+                    preprocessor, model, _ = load_model_bundle(self.config.bundle_dir)
+                else:
+                    preprocessor = load_object(file_path=self.config.preprocessor_path)
+                    model = load_object(file_path=self.model_path)
+                compiled = CompiledPreprocessor.from_column_transformer(preprocessor)
+                # Member thread budgets are fixed before the model is shared with request threads
+                ensemble_executor.prepare(model)
+                warmup_seconds = self.warmup(preprocessor, model, compiled)
+
+                with self._lock:
+                    self._artifacts = (preprocessor, model, compiled)
+                    self._signature = signature
+                    self._version = version
+                    self._state = self.STATE_READY
+                    self._error = None
+                    self._loaded_at = time.time()
+                    self._load_seconds = time.perf_counter() - start
+                    self._warmup_seconds = warmup_seconds
+                self._ready_event.set()
+                MODEL_LOAD_SECONDS.observe(self._load_seconds)
+                if warmup_seconds is None:
+                    logging.info('Model artifacts version %s loaded in %.3fs (warmup disabled)',
+                                 version, self._load_seconds)
+                else:
+                    MODEL_WARMUP_SECONDS.observe(warmup_seconds)
+                    logging.info('Model artifacts version %s loaded in %.3fs (warmup %.3fs)',
+                                 version, self._load_seconds, warmup_seconds)
+                return self._artifacts[:2]
+
+            except Exception as e:
+                MODEL_LOAD_FAILURES.inc()
+                self._error = str(e)
+                if self._artifacts is None:
+                    self._state = self.STATE_FAILED
+                logging.error('Failed to load model artifacts: %s', str(e))
+                raise CustomException(e, sys)
+
+    def _is_stale(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_check < self.config.reload_check_interval:
+            return False
+        self._last_check = now
+        try:
+            return self._file_signature() != self._signature
+        except OSError:
+            # Artifacts are being replaced; keep serving what is loaded
+            return False
+
+    def _current(self) -> tuple:
+        if self._artifacts is None:
+            self.load()
+        elif self._is_stale() and not self._reload_lock.locked():
+            try:
+                self.load()
+            except CustomException:
+                logging.warning('Reload failed, keeping model version %s', self._version)
+        return self._artifacts
+
+    def get(self) -> tuple:
+        """
+        Return the (preprocessor, model) pair, loading it on first use.
+
+        A stale check triggers a reload in the calling thread only if no other reload is running;
+        concurrent callers keep using the currently loaded objects.
+        """
+        preprocessor, model, _ = self._current()
+        return preprocessor, model
+
+    def get_compiled(self) -> tuple:
+        """ Return the (CompiledPreprocessor, model) pair from the same loaded version. """
+        _, model, compiled = self._current()
+        return compiled, model
+
+    def warm(self, background: bool = False):
+        """
+        Load the artifacts ahead of the first request.
+
+        Args:
+            background (bool): Load in a daemon thread so the worker can start answering health checks.
+        """
+        if background:
+            thread = threading.Thread(target=self._warm_quietly, name='model-registry-warmup', daemon=True)
+            thread.start()
+            return thread
+        return self.load()
+
+    def _warm_quietly(self):
+        try:
+            self.load()
+        except CustomException:
+            pass
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        return self._ready_event.wait(timeout)
+
+    def status(self) -> dict:
+        """ Readiness summary used by the health check route. """
+        return {
+            'state': self._state,
+            'ready': self.is_ready(),
+            'version': self._version,
+            'variant': self.config.model_variant,
+            'loaded_at': self._loaded_at,
+            'load_seconds': self._load_seconds,
+            'warmup_seconds': self._warmup_seconds,
+            'error': self._error,
+        }
+
+
+# Shared by every request handled by this worker process
+model_registry = ModelRegistry()
@@ -1,26 +1,135 @@
+import os
 import sys
-import pandas as pd
+import time
+from dataclasses import dataclass
+
+import numpy as np
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import load_object
+from src.metrics import metrics
+from src.pipeline.model_registry import model_registry
+from src.pipeline.ensemble_executor import ensemble_executor
+from src.schema import FEATURE_COLUMNS, SchemaValidationError, validate_features
+
+# pandas is imported only where DataFrames are built; the single-row and array paths never need it
+
+# Batch payload errors are schema errors; the old name is kept for callers that catch it
+BatchValidationError = SchemaValidationError
+
+PREDICT_STAGE_SECONDS = metrics.histogram(
+    'predict_stage_seconds', 'Time spent in each prediction pipeline stage.', ['path', 'stage'])
+PREDICTION_ERRORS = metrics.counter(
+    'prediction_errors_total', 'Predictions that raised an exception.', ['path'])
+
+
+@dataclass
+class PredictPipelineConfig:
+    """ Configuration for batch scoring: rows per transform/predict call and the largest accepted payload. """
+    batch_chunk_size: int = int(os.environ.get('PREDICT_BATCH_CHUNK_SIZE', 5000))
+    max_batch_rows: int = int(os.environ.get('PREDICT_MAX_BATCH_ROWS', 100000))
+
 
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, registry=None, config: PredictPipelineConfig = None, executor=None):
+        self.registry = registry or model_registry
+        self.config = config or PredictPipelineConfig()
+        self.executor = executor or ensemble_executor
 
     def predict(self, features):
         try:
-            preprocessor_path = 'artifacts/preprocessor.pkl'
-            model_path = 'artifacts/model.pkl'
-            preprocessor = load_object(file_path=preprocessor_path)
-            model = load_object(file_path=model_path)
+            preprocessor, model = self.registry.get()
+            start = time.perf_counter()
             data_scaled = preprocessor.transform(features)
-            pred = model.predict(data_scaled)
+            transformed = time.perf_counter()
+            pred = self.executor.predict(model, data_scaled)
+            PREDICT_STAGE_SECONDS.labels('dataframe', 'transform').observe(transformed - start)
+            PREDICT_STAGE_SECONDS.labels('dataframe', 'predict').observe(time.perf_counter() - transformed)
             return pred
         except Exception as e:
+            PREDICTION_ERRORS.labels('dataframe').inc()
             logging.info('Exception occured in prediction pipeline')
             raise CustomException(e,sys)
-        
+
+    def predict_rows(self, rows):
+        """
+        Pandas-free fast path: score rows given as sequences in FEATURE_COLUMNS order.
+
+        Args:
+            rows: 2-D sequence (or object array) of raw feature values, e.g. from `CustomData.get_data_as_array`.
+
+        Returns:
+            np.ndarray: Predicted prices, one per row.
+        """
+        try:
+            compiled, model = self.registry.get_compiled()
+            start = time.perf_counter()
+            data_scaled = compiled.transform(rows)
+            transformed = time.perf_counter()
+            pred = self.executor.predict(model, data_scaled)
+            PREDICT_STAGE_SECONDS.labels('rows', 'transform').observe(transformed - start)
+            PREDICT_STAGE_SECONDS.labels('rows', 'predict').observe(time.perf_counter() - transformed)
+            return pred
+        except Exception as e:
+            PREDICTION_ERRORS.labels('rows').inc()
+            logging.info('Exception occured in prediction pipeline fast path')
+            raise CustomException(e,sys)
+
+    def predict_batch(self, features, chunk_size=None):
+        """
+        Score a large DataFrame with one transform and one model call per chunk.
+
+        Args:
+            features (pd.DataFrame): Rows with the FEATURE_COLUMNS.
+            chunk_size (int): Rows per chunk; defaults to the configured batch chunk size.
+
+        Returns:
+            np.ndarray: Predicted prices, in input order.
+        """
+        try:
+            chunk_size = chunk_size or self.config.batch_chunk_size
+            preprocessor, model = self.registry.get()
+            preds = np.empty(len(features), dtype=np.float64)
+            for start in range(0, len(features), chunk_size):
+                chunk = features.iloc[start:start + chunk_size]
+                chunk_start = time.perf_counter()
+                data_scaled = preprocessor.transform(chunk)
+                transformed = time.perf_counter()
+                preds[start:start + len(chunk)] = self.executor.predict(model, data_scaled)
+                PREDICT_STAGE_SECONDS.labels('batch', 'transform').observe(transformed - chunk_start)
+                PREDICT_STAGE_SECONDS.labels('batch', 'predict').observe(time.perf_counter() - transformed)
+            logging.info('Batch of %d rows scored in chunks of %d', len(features), chunk_size)
+            return preds
+        except Exception as e:
+            PREDICTION_ERRORS.labels('batch').inc()
+            logging.info('Exception occured in batch prediction pipeline')
+            raise CustomException(e,sys)
+
+
+class CustomBatchData:
+    """
+    Many gemstones in one payload, either a list of records
+    (`[{"carat": 0.5, ...}, ...]`) or columnar (`{"carat": [0.5, ...], ...}`).
+    """
+
+    def __init__(self, payload, max_rows=None):
+        self.payload = payload
+        self.max_rows = max_rows
+
+    def get_data_as_dataframe(self):
+        """
+        Validate the batch against the request schema and build the DataFrame from the typed arrays.
+        Missing values are accepted and left to the preprocessor's imputers.
+
+        Raises:
+            SchemaValidationError: If the payload is malformed, too large, or has invalid values.
+        """
+        import pandas as pd
+
+        features = validate_features(self.payload, max_rows=self.max_rows, allow_missing=True)
+        df = pd.DataFrame(features.as_columns(), columns=FEATURE_COLUMNS)
+        logging.info('Batch dataframe of %d rows gathered', len(df))
+        return df
+
 
 class CustomData:
     def __init__(self,
@@ -46,6 +155,8 @@ class CustomData:
 
     def get_data_as_dataframe(self):
         try:
+            import pandas as pd
+
             custom_data_input_dict = {
                 'carat':[self.carat],
                 'depth':[self.depth],
@@ -58,9 +169,14 @@ class CustomData:
                 'clarity':[self.clarity]
             }
             df = pd.DataFrame(custom_data_input_dict)
-            logging.info('Dataframe Gathered')
+            logging.debug('Dataframe Gathered')
             return df
         except Exception as e:
             logging.info('Exception Occured in prediction pipeline')
             raise CustomException(e,sys)
+
+    def get_data_as_array(self):
+        """ One-row object array in FEATURE_COLUMNS order, for `PredictPipeline.predict_rows`. """
+        return np.array([[self.carat, self.depth, self.table, self.x, self.y, self.z,
+                          self.cut, self.color, self.clarity]], dtype=object)
             
\ No newline at end of file
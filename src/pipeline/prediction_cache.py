@@ -0,0 +1,119 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass
+class PredictionCacheConfig:
+    """ Configuration for the single-row prediction cache. """
+    enabled: bool = os.environ.get('PREDICT_CACHE_ENABLED', '1') == '1'
+    max_entries: int = int(os.environ.get('PREDICT_CACHE_MAX_ENTRIES', 10000))
+    ttl_seconds: float = float(os.environ.get('PREDICT_CACHE_TTL_SECONDS', 3600))
+    float_decimals: int = int(os.environ.get('PREDICT_CACHE_FLOAT_DECIMALS', 4))
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with TTL for single-gemstone predictions.
+
+    Keys are the canonicalized nine feature values (numerics rounded to `float_decimals`,
+    categories stripped). Every lookup carries the model registry version; when it differs
+    from the version the entries were computed with, the whole cache is dropped.
+    """
+
+    def __init__(self, config: PredictionCacheConfig = None):
+        self.config = config or PredictionCacheConfig()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, row) -> tuple:
+        """
+        Canonical key for one row in FEATURE_COLUMNS order
+        (carat, depth, table, x, y, z, cut, color, clarity).
+        """
+        decimals = self.config.float_decimals
+        numeric = tuple(round(float(value), decimals) + 0.0 for value in row[:6])
+        categorical = tuple(str(value).strip() for value in row[6:])
+        return numeric + categorical
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (value, time.monotonic() + self.config.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.config.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, features, version, compute):
+        """
+        Return the cached prediction for a one-row feature array, computing it on a miss.
+
+        Args:
+            features: One-row array in FEATURE_COLUMNS order (see `ValidatedFeatures.as_rows`).
+            version: Model registry version the prediction is valid for.
+            compute: Callable taking `features` and returning an array of predictions.
+
+        Returns:
+            float: Predicted price.
+        """
+        if not self.config.enabled:
+            return float(compute(features)[0])
+        key = self.make_key(features[0])
+        value = self.get(key, version)
+        if value is None:
+            value = float(compute(features)[0])
+            self.put(key, version, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.config.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.config.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'model_version': self._version,
+            }
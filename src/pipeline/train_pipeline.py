@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import dataclasses
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging
+from src.dataset import FeatureTargetSet
+from src.artifact_bundle import MANIFEST_FILE
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation
+from src.components.model_trainer import ModelTrainer
+from src.components.model_distiller import ModelDistiller
+from src.utils import load_object
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class TrainPipelineConfig:
+    """ Configuration for the cached training pipeline runner. """
+    cache_dir: str = os.path.join('artifacts', 'stage_cache')
+    bakeoff_report_path: str = os.path.join('artifacts', 'bakeoff_report.json')
+    tuned_params_path: str = os.path.join('artifacts', 'tuned_params.json')
+    # Ignore cached results and rerun every stage
+    force: bool = os.environ.get('TRAIN_PIPELINE_FORCE', '0') == '1'
+
+
+def _hash_path(digest, path):
+    """ Feed a file, or every file under a directory in sorted order, into `digest`. """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file_name in sorted(files):
+                file_path = os.path.join(root, file_name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                _hash_path(digest, file_path)
+        return
+    with open(path, 'rb') as file_obj:
+        for block in iter(lambda: file_obj.read(1 << 20), b''):
+            digest.update(block)
+
+
+def _config_params(config) -> dict:
+    """ Plain-value view of a config object (dataclass fields and class-level settings alike). """
+    if dataclasses.is_dataclass(config):
+        values = dataclasses.asdict(config)
+    else:
+        values = {}
+    for name in dir(config):
+        if not name.startswith('_') and name not in values:
+            value = getattr(config, name)
+            if isinstance(value, (str, int, float, bool, type(None))):
+                values[name] = value
+    return values
+
+
+class StageCache:
+    """
+    Content-addressed record of completed pipeline stages.
+
+    A stage's key is the sha256 of its input files, its parameters and the source of the modules
+    that implement it. The cache stores one JSON record per stage under `cache_dir`; a stage is
+    skipped when its key matches the record and every output it listed still exists.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def key(self, inputs, params, code) -> str:
+        digest = hashlib.sha256()
+        for path in inputs:
+            digest.update(path.encode())
+            _hash_path(digest, path)
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        for module in code:
+            _hash_path(digest, os.path.join(SRC_DIR, module))
+        return digest.hexdigest()
+
+    def _record_path(self, stage) -> str:
+        return os.path.join(self.cache_dir, f'{stage}.json')
+
+    def lookup(self, stage, key):
+        try:
+            with open(self._record_path(stage)) as file_obj:
+                record = json.load(file_obj)
+        except (OSError, ValueError):
+            return None
+        if record.get('key') != key or not all(os.path.exists(path) for path in record['outputs']):
+            return None
+        return record
+
+    def store(self, stage, key, outputs, result=None, seconds=None):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        record = {'stage': stage, 'key': key, 'outputs': outputs, 'result': result,
+                  'seconds': seconds, 'completed_at': time.time()}
+        with open(self._record_path(stage), 'w') as file_obj:
+            json.dump(record, file_obj, indent=2, default=str)
+
+
+class TrainPipeline:
+    """
+    Runs ingest -> transform -> bake-off -> tune -> ensemble (-> distill), skipping every stage whose inputs,
+    parameters and code are unchanged since its last successful run. Because keys are computed
+    from input *content*, a rerun resumes at the first stale stage and later stages rerun only
+    if that stage actually produced different outputs.
+    """
+
+    def __init__(self, config: TrainPipelineConfig = None):
+        self.config = config or TrainPipelineConfig()
+        self.cache = StageCache(self.config.cache_dir)
+        self.ingestion = DataIngestion()
+        self.transformation = DataTransformation()
+        self.trainer = ModelTrainer()
+        self.distiller = ModelDistiller()
+        self.stage_log = []
+
+    def _run_stage(self, stage, inputs, params, code, outputs, compute):
+        key = self.cache.key(inputs, params, code)
+        record = None if self.config.force else self.cache.lookup(stage, key)
+        if record is not None:
+            logging.info('Stage %s is up to date (key %s), skipping', stage, key[:12])
+            self.stage_log.append({'stage': stage, 'cached': True, 'seconds': 0.0})
+            return record['result']
+
+        logging.info('Stage %s is stale (key %s), running', stage, key[:12])
+        start = time.perf_counter()
+        result = compute()
+        seconds = time.perf_counter() - start
+        self.cache.store(stage, key, outputs, result, seconds)
+        self.stage_log.append({'stage': stage, 'cached': False, 'seconds': seconds})
+        logging.info('Stage %s finished in %.1fs', stage, seconds)
+        return result
+
+    def _dataset_files(self, name) -> list:
+        dataset_dir = self.transformation.data_transformation_config.dataset_dir
+        return [os.path.join(dataset_dir, f'{name}_features.npy'), os.path.join(dataset_dir, f'{name}_target.npy')]
+
+    def _load_datasets(self) -> tuple:
+        dataset_dir = self.transformation.data_transformation_config.dataset_dir
+        return (FeatureTargetSet.load(dataset_dir, 'train'), FeatureTargetSet.load(dataset_dir, 'test'))
+
+    def run(self):
+        """
+        Returns:
+            tuple: (mae, rmse, r2) of the final ensemble on the test data.
+        """
+        try:
+            ingestion_config = self.ingestion.ingestion_config
+            transformation_config = self.transformation.data_transformation_config
+            trainer_config = self.trainer.model_trainer_config
+            train_dir, test_dir = self.ingestion.split_paths()
+
+            self._run_stage(
+                'ingest',
+                inputs=[ingestion_config.source_data_path],
+                params=_config_params(ingestion_config),
+                code=['components/data_ingestion.py', 'columnar.py'],
+                outputs=[train_dir, test_dir],
+                compute=lambda: list(self.ingestion.initate_data_ingestion())
+            )
+
+            def transform():
+                train_set, test_set, _ = self.transformation.initate_data_transformation(train_dir, test_dir)
+                if not transformation_config.mmap_datasets:
+                    train_set.save(transformation_config.dataset_dir, 'train')
+                    test_set.save(transformation_config.dataset_dir, 'test')
+
+            self._run_stage(
+                'transform',
+                inputs=[train_dir, test_dir],
+                params=_config_params(transformation_config),
+                code=['components/data_transformation.py', 'pipeline/compiled_preprocessor.py', 'dataset.py'],
+                outputs=[transformation_config.preprocessor_obj_file_path,
+                         transformation_config.compiled_preprocessor_file_path]
+                        + self._dataset_files('train') + self._dataset_files('test'),
+                compute=transform
+            )
+            dataset_files = self._dataset_files('train') + self._dataset_files('test')
+
+            def bakeoff():
+                report = self.trainer.run_bakeoff(*self._load_datasets())
+                with open(self.config.bakeoff_report_path, 'w') as file_obj:
+                    json.dump(report, file_obj, indent=2)
+                return report
+
+            self._run_stage(
+                'bakeoff',
+                inputs=dataset_files,
+                params={key: value for key, value in _config_params(trainer_config).items() if key.startswith('bakeoff')},
+                code=['components/model_trainer.py', 'utils.py'],
+                outputs=[self.config.bakeoff_report_path],
+                compute=bakeoff
+            )
+
+            def tune():
+                tuned_params = self.trainer.tune_models(self._load_datasets()[0])
+                with open(self.config.tuned_params_path, 'w') as file_obj:
+                    json.dump(tuned_params, file_obj, indent=2)
+                return tuned_params
+
+            self._run_stage(
+                'tune',
+                inputs=dataset_files,
+                params={key: value for key, value in _config_params(trainer_config).items() if key.startswith('catboost')},
+                code=['components/model_trainer.py', 'components/hyperparameter_search.py'],
+                outputs=[self.config.tuned_params_path],
+                compute=tune
+            )
+
+            def ensemble():
+                with open(self.config.tuned_params_path) as file_obj:
+                    tuned_params = json.load(file_obj)
+                return list(self.trainer.fit_ensemble(tuned_params, *self._load_datasets()))
+
+            metrics = self._run_stage(
+                'ensemble',
+                inputs=dataset_files + [self.config.tuned_params_path],
+                params={key: value for key, value in _config_params(trainer_config).items() if key.startswith('knn')},
+                code=['components/model_trainer.py', 'components/indexed_knn.py', 'artifact_bundle.py'],
+                outputs=[trainer_config.trained_model_file_path, trainer_config.knn_index_file_path,
+                         os.path.join(trainer_config.model_bundle_dir, MANIFEST_FILE)],
+                compute=ensemble
+            )
+
+            distiller_config = self.distiller.distiller_config
+            if distiller_config.enabled:
+                self._run_stage(
+                    'distill',
+                    inputs=dataset_files + [trainer_config.trained_model_file_path],
+                    params=_config_params(distiller_config),
+                    code=['components/model_distiller.py'],
+                    outputs=[distiller_config.student_model_file_path, distiller_config.report_file_path],
+                    compute=lambda: self.distiller.distill(
+                        load_object(trainer_config.trained_model_file_path), *self._load_datasets())
+                )
+
+            logging.info('Training pipeline finished: %s', self.stage_log)
+            return tuple(metrics)
+
+        except Exception as e:
+            logging.error('Exception occured in training pipeline: %s', str(e))
+            raise CustomException(e, sys)
+
+
+if __name__ == '__main__':
+    mae, rmse, r2 = TrainPipeline().run()
+    print(f'Test MAE: {mae:.4f}, RMSE: {rmse:.4f}, R2: {r2:.4f}')
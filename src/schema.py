@@ -0,0 +1,204 @@
+"""
+Request schema for gemstone features: column names, allowed categories and numeric ranges.
+
+Payloads are validated column by column in one pass and converted straight into typed arrays
+(float64 numerics, object categoricals) that the compiled preprocessor and the micro-batcher
+consume, so malformed input is rejected with a structured 400 before any model work starts.
+This module only needs NumPy, so serving can import it without pulling in pandas or sklearn.
+"""
+import numpy as np
+
+NUMERICAL_COLUMNS = ['carat', 'depth', 'table', 'x', 'y', 'z']
+CATEGORICAL_COLUMNS = ['cut', 'color', 'clarity']
+FEATURE_COLUMNS = NUMERICAL_COLUMNS + CATEGORICAL_COLUMNS
+
+# Ordinal category orders, worst to best (also used by the OrdinalEncoder in DataTransformation)
+CUT_CATEGORIES = ['Fair', 'Good', 'Very Good', 'Premium', 'Ideal']
+COLOR_CATEGORIES = ['D', 'E', 'F', 'G', 'H', 'I', 'J']
+CLARITY_CATEGORIES = ['I1', 'SI2', 'SI1', 'VS2', 'VS1', 'VVS2', 'VVS1', 'IF']
+CATEGORY_LEVELS = {'cut': CUT_CATEGORIES, 'color': COLOR_CATEGORIES, 'clarity': CLARITY_CATEGORIES}
+_FEATURE_SET = frozenset(FEATURE_COLUMNS)
+
+# Inclusive bounds of physically plausible stones; x/y/z of 0 occur in the source data
+NUMERIC_RANGES = {
+    'carat': (0.1, 10.0),
+    'depth': (40.0, 80.0),
+    'table': (40.0, 100.0),
+    'x': (0.0, 20.0),
+    'y': (0.0, 20.0),
+    'z': (0.0, 20.0),
+}
+
+# Field errors listed per response; the total count is always reported
+MAX_REPORTED_ERRORS = 50
+
+
+class SchemaValidationError(ValueError):
+    """ Raised when a payload does not match the schema; `errors` holds one dict per problem found. """
+
+    def __init__(self, errors, n_errors=None, status_code=400):
+        super().__init__('; '.join(
+            f"{error.get('field', 'payload')}[{error['row']}]: {error['message']}" if 'row' in error
+            else f"{error.get('field', 'payload')}: {error['message']}"
+            for error in errors[:5]
+        ))
+        self.errors = errors
+        self.n_errors = len(errors) if n_errors is None else n_errors
+        self.status_code = status_code
+
+    def to_dict(self) -> dict:
+        return {'errors': self.errors, 'error_count': self.n_errors}
+
+
+class ValidatedFeatures:
+    """ Typed feature arrays of a validated payload. """
+
+    def __init__(self, numeric, categorical):
+        self.numeric = numeric
+        self.categorical = categorical
+
+    def __len__(self):
+        return len(self.numeric)
+
+    def as_rows(self) -> np.ndarray:
+        """ (n, 9) object array in FEATURE_COLUMNS order, as taken by `PredictPipeline.predict_rows`. """
+        rows = np.empty((len(self), len(FEATURE_COLUMNS)), dtype=object)
+        rows[:, :len(NUMERICAL_COLUMNS)] = self.numeric
+        rows[:, len(NUMERICAL_COLUMNS):] = self.categorical
+        return rows
+
+    def as_columns(self) -> dict:
+        """ Column name -> array, e.g. for `pd.DataFrame(...)`. """
+        columns = {name: self.numeric[:, j] for j, name in enumerate(NUMERICAL_COLUMNS)}
+        columns.update({name: self.categorical[:, j] for j, name in enumerate(CATEGORICAL_COLUMNS)})
+        return columns
+
+
+def _field_errors(keys, row=None) -> list:
+    """ Unknown and absent fields of one record (or of a columnar payload when `row` is None). """
+    keys = set(keys)
+    where = {} if row is None else {'row': row}
+    errors = [dict(where, field=name, message='unknown field') for name in sorted(keys - _FEATURE_SET, key=str)]
+    errors.extend(dict(where, field=name, message='field is missing') for name in FEATURE_COLUMNS if name not in keys)
+    return errors
+
+
+def _payload_columns(payload):
+    """
+    Split a single record, list of records or object of columns into per-field value lists.
+
+    Every field must be present (an explicit null is how a value is left to the imputers) and no
+    other keys are accepted, so misspelled fields are reported instead of silently imputed.
+    """
+    if isinstance(payload, list):
+        if not all(isinstance(row, dict) for row in payload):
+            raise SchemaValidationError([{'message': 'every element of a record payload must be an object'}])
+        errors = [error for row, record in enumerate(payload) if record.keys() != _FEATURE_SET
+                  for error in _field_errors(record, row)]
+        if errors:
+            raise SchemaValidationError(errors[:MAX_REPORTED_ERRORS], n_errors=len(errors))
+        return {name: [row[name] for row in payload] for name in FEATURE_COLUMNS}, len(payload)
+
+    if not isinstance(payload, dict):
+        raise SchemaValidationError([{'message': 'payload must be a JSON object, an array of records or an object of columns'}])
+
+    if payload and all(isinstance(value, list) for value in payload.values()):
+        errors = _field_errors(payload)
+        if errors:
+            raise SchemaValidationError(errors[:MAX_REPORTED_ERRORS], n_errors=len(errors))
+        lengths = {len(value) for value in payload.values()}
+        if len(lengths) != 1:
+            raise SchemaValidationError([{'message': 'columnar payload must map each field to a list of equal length'}])
+        return {name: payload[name] for name in FEATURE_COLUMNS}, lengths.pop()
+
+    errors = _field_errors(payload, 0)
+    if errors:
+        raise SchemaValidationError(errors[:MAX_REPORTED_ERRORS], n_errors=len(errors))
+    return {name: [payload[name]] for name in FEATURE_COLUMNS}, 1
+
+
+def _to_float(value):
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if value is None or value == '':
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def validate_features(payload, max_rows=None, allow_missing=False) -> ValidatedFeatures:
+    """
+    Validate a payload and convert it into typed feature arrays.
+
+    Args:
+        payload: One record (`{"carat": 0.5, ...}`, e.g. JSON or form fields), a list of records,
+            or an object of equal-length columns (`{"carat": [0.5, ...], ...}`).
+        max_rows (int): Largest accepted number of rows (413 beyond it; 400 when it is 1).
+        allow_missing (bool): Accept explicit nulls, to be imputed by the preprocessor. Fields must
+            still be present; absent and unknown fields are always rejected.
+
+    Raises:
+        SchemaValidationError: Listing every absent or unknown field, missing value, non-numeric or
+            out-of-range number and unknown category, with the row it occurs in.
+    """
+    columns, n_rows = _payload_columns(payload)
+    if n_rows == 0:
+        raise SchemaValidationError([{'message': 'payload contains no rows'}])
+    if max_rows == 1 and n_rows > 1:
+        # Single-record routes: a malformed request rather than an oversized one
+        raise SchemaValidationError([{'message': f'expected a single record, got {n_rows} rows'}])
+    if max_rows is not None and n_rows > max_rows:
+        raise SchemaValidationError([{'message': f'payload has {n_rows} rows, the limit is {max_rows}'}], status_code=413)
+
+    errors = []
+    numeric = np.empty((n_rows, len(NUMERICAL_COLUMNS)), dtype=np.float64)
+    for j, name in enumerate(NUMERICAL_COLUMNS):
+        values = columns[name]
+        invalid = np.zeros(n_rows, dtype=bool)
+        try:
+            # JSON true/false would silently become 1.0/0.0 on the fast path
+            if any(isinstance(value, (bool, np.bool_)) for value in values):
+                raise TypeError('boolean value in a numeric field')
+            # Fast path: numbers and numeric strings convert in one call
+            numeric[:, j] = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            converted = [_to_float(value) for value in values]
+            invalid = np.fromiter((value is None for value in converted), dtype=bool, count=n_rows)
+            for row in np.flatnonzero(invalid):
+                errors.append({'row': int(row), 'field': name, 'message': f'not a number: {values[row]!r}'})
+            numeric[:, j] = [np.nan if value is None else value for value in converted]
+
+        column = numeric[:, j]
+        low, high = NUMERIC_RANGES[name]
+        missing = np.isnan(column) & ~invalid
+        if not allow_missing:
+            for row in np.flatnonzero(missing):
+                errors.append({'row': int(row), 'field': name, 'message': 'value is required'})
+        with np.errstate(invalid='ignore'):
+            bad = (column < low) | (column > high)
+        for row in np.flatnonzero(bad):
+            errors.append({'row': int(row), 'field': name,
+                           'message': f'{column[row]:g} is outside [{low:g}, {high:g}]'})
+
+    categorical = np.empty((n_rows, len(CATEGORICAL_COLUMNS)), dtype=object)
+    for j, name in enumerate(CATEGORICAL_COLUMNS):
+        allowed = set(CATEGORY_LEVELS[name])
+        values = columns[name]
+        for row, value in enumerate(values):
+            if value is None or value == '':
+                if not allow_missing:
+                    errors.append({'row': row, 'field': name, 'message': 'value is required'})
+                # NaN rather than None: the sklearn imputers only recognise NaN as missing
+                categorical[row, j] = np.nan
+            elif isinstance(value, str) and value in allowed:
+                categorical[row, j] = value
+            else:
+                errors.append({'row': row, 'field': name,
+                               'message': f'{value!r} is not one of {CATEGORY_LEVELS[name]}'})
+
+    if errors:
+        errors.sort(key=lambda error: (error['row'], FEATURE_COLUMNS.index(error['field'])))
+        raise SchemaValidationError(errors[:MAX_REPORTED_ERRORS], n_errors=len(errors))
+    return ValidatedFeatures(numeric, categorical)
@@ -1,14 +1,15 @@
 import os
 import sys
+import time
 
 import numpy as np 
-import pandas as pd
-import dill
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 
 from src.exception import CustomException
 from src.logger import logging
 
+# dill, joblib and sklearn.metrics are imported inside the functions that use them: serving only
+# needs load_object, and importing this module should not pull in the training dependencies.
+
 def save_object(file_path, obj):
     """
     Save a Python object to a specified path using dill.
@@ -18,6 +19,8 @@ def save_object(file_path, obj):
     - obj: The Python object to save.
     """
     try:
+        import dill
+
         logging.info(f"Saving object to {file_path}...")
         
         dir_path = os.path.dirname(file_path)
@@ -32,34 +35,96 @@ def save_object(file_path, obj):
         logging.error(f"Failed to save object to {file_path}. Error: {str(e)}")
         raise CustomException(e, sys)
 
-def evaluate_models(xtrain, ytrain, xtest, ytest, models):
+def _thread_param(model):
+    """ Name of the estimator parameter that controls its native thread count, if any. """
+    # CatBoost only reports parameters passed explicitly, so it is matched by module
+    if type(model).__module__.startswith('catboost'):
+        return 'thread_count'
+    params = model.get_params()
+    for name in ('thread_count', 'n_jobs'):
+        if name in params:
+            return name
+    return None
+
+def _fit_and_score(model_name, model, xtrain, ytrain, xtest, ytest, threads_per_model):
+    """ Fit one candidate and score it on the test set; runs inside a worker process. """
+    from sklearn.metrics import r2_score
+
+    thread_param = _thread_param(model)
+    if thread_param is not None:
+        model.set_params(**{thread_param: threads_per_model})
+
+    start = time.perf_counter()
+    model.fit(xtrain, ytrain)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_test_pred = model.predict(xtest)
+    predict_time = time.perf_counter() - start
+
+    return model_name, model, {
+        'r2': r2_score(ytest, y_test_pred),
+        'fit_time': fit_time,
+        'predict_time': predict_time,
+    }
+
+def evaluate_models(xtrain, ytrain, xtest, ytest, models, n_jobs=1, threads_per_model=None):
     """
-    Train and evaluate multiple models on given data.
+    Train and evaluate multiple models on given data, optionally in parallel worker processes.
     
     Parameters:
     - xtrain, ytrain: Training data and labels.
     - xtest, ytest: Testing data and labels.
     - models: A dictionary containing model names as keys and model instances as values.
+      The fitted instances are written back into this dictionary.
+    - n_jobs, threads_per_model: See evaluate_models_detailed.
 
     Returns:
     - report: A dictionary containing model names as keys and their R2 scores on test data as values.
     """
+    detailed = evaluate_models_detailed(xtrain, ytrain, xtest, ytest, models, n_jobs, threads_per_model)
+    return {model_name: scores['r2'] for model_name, scores in detailed.items()}
+
+def evaluate_models_detailed(xtrain, ytrain, xtest, ytest, models, n_jobs=1, threads_per_model=None):
+    """
+    Like evaluate_models, but also reports how long each candidate took to fit and predict.
+    
+    Parameters:
+    - xtrain, ytrain: Training data and labels.
+    - xtest, ytest: Testing data and labels.
+    - models: A dictionary containing model names as keys and model instances as values.
+      The fitted instances are written back into this dictionary.
+    - n_jobs: Number of candidates fitted concurrently (-1 for one per core).
+    - threads_per_model: Native threads each threaded learner (XGBoost, CatBoost, ...) may use.
+      Defaults to cores // n_jobs so the pool does not oversubscribe the machine.
+
+    Returns:
+    - report: A dictionary containing model names as keys and, as values, a dictionary with the
+      R2 score on test data ('r2') and the fit and predict wall times in seconds.
+    """
     report = {}
     try:
-        for i in range(len(models)):
-            model_name = list(models.keys())[i]
-            model = list(models.values())[i]
-            
-            logging.info(f"Training {model_name}...")
+        from joblib import Parallel, delayed
 
-            model.fit(xtrain, ytrain)
-            logging.info(f"{model_name} trained successfully.")
+        n_cores = os.cpu_count() or 1
+        n_workers = n_cores if n_jobs == -1 else max(1, min(n_jobs, n_cores))
+        n_workers = min(n_workers, len(models))
+        if threads_per_model is None:
+            threads_per_model = max(1, n_cores // n_workers)
 
-            y_train_pred = model.predict(xtrain)
-            y_test_pred = model.predict(xtest)
+        logging.info(f"Training {len(models)} models on {n_workers} workers, {threads_per_model} threads each...")
 
-            test_model_score = r2_score(ytest, y_test_pred)
-            report[model_name] =  test_model_score
+        # Loky memory-maps large arrays, so workers share the training data instead of copying it
+        results = Parallel(n_jobs=n_workers, backend='loky')(
+            delayed(_fit_and_score)(model_name, model, xtrain, ytrain, xtest, ytest, threads_per_model)
+            for model_name, model in models.items()
+        )
+
+        for model_name, fitted_model, scores in results:
+            models[model_name] = fitted_model
+            report[model_name] = scores
+            logging.info(f"{model_name}: R2 {scores['r2']:.4f}, fit {scores['fit_time']:.2f}s, "
+                         f"predict {scores['predict_time']:.2f}s")
 
         logging.info("All models evaluated successfully.")
         return report
@@ -80,6 +145,8 @@ def model_metrics(true, predicted):
     - mae, rmse, r2_square: Mean Absolute Error, Root Mean Squared Error, and R2 score, respectively.
     """
     try:
+        from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+
         mae = mean_absolute_error(true, predicted)
         mse = mean_squared_error(true, predicted)
         rmse = np.sqrt(mse)
@@ -136,12 +203,14 @@ def load_object(file_path):
     - The loaded Python object.
     """
     try:
-        logging.info(f"Loading object from {file_path}...")
+        import dill
+
+        logging.debug("Loading object from %s...", file_path)
 
         with open(file_path, 'rb') as file_obj:
             obj = dill.load(file_obj)
 
-        logging.info(f"Object successfully loaded from {file_path}.")
+        logging.debug("Object successfully loaded from %s.", file_path)
         return obj
 
     except Exception as e:
@@ -0,0 +1,32 @@
+import numpy as np
+from catboost import CatBoostRegressor
+from sklearn.ensemble import VotingRegressor
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from src.artifact_bundle import load_model_bundle
+from src.components.indexed_knn import IndexedKNNRegressor
+from src.components.model_trainer import ModelTrainer
+from src.utils import load_object, save_object
+
+
+def test_saved_ensemble_bundle_predicts_like_the_pickle(tmp_path, monkeypatch):
+    # save_ensemble writes to the configured artifacts/ paths, relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 9))
+    y = X @ rng.normal(size=9) + rng.normal(scale=0.1, size=300)
+    save_object('artifacts/preprocessor.pkl', StandardScaler().fit(X))
+
+    er = VotingRegressor([
+        ('cbr', CatBoostRegressor(iterations=20, depth=3, verbose=False)),
+        ('xgb', XGBRegressor(n_estimators=20)),
+        ('knn', IndexedKNNRegressor(n_neighbors=5, index_path='artifacts/knn_index.joblib')),
+    ], weights=[3, 2, 1]).fit(X, y)
+    ModelTrainer().save_ensemble(er)
+
+    pickled = load_object('artifacts/model.pkl')
+    _, bundled, manifest = load_model_bundle('artifacts/model_bundle')
+
+    assert bundled.n_features_in_ == X.shape[1]
+    np.testing.assert_allclose(bundled.predict(X[:50]), pickled.predict(X[:50]), rtol=1e-6)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from src.columnar import ColumnarWriter, load_columnar, read_schema, save_columnar
+
+
+def test_string_dtype_column_is_stored_as_categorical(tmp_path):
+    df = pd.DataFrame({
+        'carat': np.array([0.3, 0.7, 1.1], dtype=np.float32),
+        'cut': pd.array(['Ideal', None, 'Premium'], dtype='string'),
+    })
+    save_columnar(df, str(tmp_path))
+
+    columns = {column['name']: column for column in read_schema(str(tmp_path))['columns']}
+    assert columns['cut']['dtype'] == 'int16'
+    assert columns['cut']['categories'] == ['Ideal', 'Premium']
+
+    loaded = load_columnar(str(tmp_path), mmap=False)
+    np.testing.assert_array_equal(loaded['carat'].to_numpy(), df['carat'].to_numpy())
+    assert loaded['cut'].tolist()[0] == 'Ideal'
+    assert pd.isna(loaded['cut'].tolist()[1])
+    assert loaded['cut'].tolist()[2] == 'Premium'
+
+
+def test_append_extends_categories(tmp_path):
+    first = pd.DataFrame({'color': pd.array(['D', 'E'], dtype='string')})
+    second = pd.DataFrame({'color': ['F', 'D']})
+    save_columnar(first, str(tmp_path))
+    with ColumnarWriter(str(tmp_path), append=True) as writer:
+        writer.append(second)
+
+    assert load_columnar(str(tmp_path), mmap=False)['color'].tolist() == ['D', 'E', 'F', 'D']
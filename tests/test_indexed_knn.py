@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+from sklearn.base import is_regressor
+from sklearn.ensemble import VotingRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.neighbors import KNeighborsRegressor
+
+from src.components.indexed_knn import IndexedKNNRegressor
+
+
+def make_data(n_rows=200, n_features=9, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    y = X @ rng.normal(size=n_features) + rng.normal(scale=0.1, size=n_rows)
+    return X, y
+
+
+def test_is_regressor():
+    assert is_regressor(IndexedKNNRegressor())
+
+
+def test_matches_kneighbors_regressor():
+    X, y = make_data()
+    indexed = IndexedKNNRegressor(n_neighbors=5).fit(X, y)
+    reference = KNeighborsRegressor(n_neighbors=5).fit(X, y)
+    np.testing.assert_allclose(indexed.predict(X[:20]), reference.predict(X[:20]))
+
+
+def test_fits_in_voting_regressor(tmp_path):
+    X, y = make_data()
+    knn = IndexedKNNRegressor(n_neighbors=5, index_path=str(tmp_path / 'knn_index.joblib'))
+    er = VotingRegressor([('lr', LinearRegression()), ('knn', knn)], weights=[3, 1])
+    er.fit(X, y)
+    assert er.predict(X[:10]).shape == (10,)
+
+
+def test_save_index_replaces_file_atomically(tmp_path):
+    X, y = make_data()
+    index_path = str(tmp_path / 'knn_index.joblib')
+    knn = IndexedKNNRegressor(n_neighbors=3).fit(X, y)
+    knn.save_index(index_path)
+    knn.save_index(index_path)
+    assert os.listdir(tmp_path) == ['knn_index.joblib']
+
+    attached = IndexedKNNRegressor(n_neighbors=3, index_path=index_path)
+    np.testing.assert_allclose(attached.predict(X[:10]), knn.predict(X[:10]))
@@ -0,0 +1,17 @@
+from src.metrics import MetricsRegistry
+
+
+def test_large_counter_is_exported_exactly():
+    registry = MetricsRegistry()
+    counter = registry.counter('requests_total', 'Requests.')
+    counter.inc(1234567)
+    assert 'requests_total 1234567\n' in registry.render()
+
+
+def test_collector_gauges_are_exported_exactly():
+    registry = MetricsRegistry()
+    registry.register_collector('cache', lambda: {'hits': 9876543, 'hit_ratio': 0.123456789, 'enabled': True})
+    rendered = registry.render()
+    assert 'cache_hits 9876543\n' in rendered
+    assert 'cache_hit_ratio 0.123456789\n' in rendered
+    assert 'cache_enabled 1\n' in rendered
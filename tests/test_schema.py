@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from src.schema import SchemaValidationError, validate_features
+
+VALID = {'carat': 0.7, 'depth': 61.5, 'table': 57.0, 'x': 5.7, 'y': 5.72, 'z': 3.51,
+         'cut': 'Ideal', 'color': 'G', 'clarity': 'VS2'}
+
+
+def test_valid_record():
+    features = validate_features(VALID)
+    assert len(features) == 1
+    np.testing.assert_allclose(features.numeric[0], [0.7, 61.5, 57.0, 5.7, 5.72, 3.51])
+    assert list(features.categorical[0]) == ['Ideal', 'G', 'VS2']
+
+
+@pytest.mark.parametrize('value', [True, False])
+def test_boolean_numeric_is_rejected(value):
+    with pytest.raises(SchemaValidationError) as excinfo:
+        validate_features(dict(VALID, x=value))
+    assert [(error['row'], error['field']) for error in excinfo.value.errors] == [(0, 'x')]
+
+
+def test_boolean_numeric_is_rejected_with_allow_missing():
+    with pytest.raises(SchemaValidationError):
+        validate_features([VALID, dict(VALID, depth=True)], allow_missing=True)
+
+
+def test_single_record_rejects_columnar_multi_row_payload():
+    payload = {name: [value, value] for name, value in VALID.items()}
+    with pytest.raises(SchemaValidationError) as excinfo:
+        validate_features(payload, max_rows=1)
+    assert excinfo.value.status_code == 400
+
+
+def test_oversized_batch_is_413():
+    with pytest.raises(SchemaValidationError) as excinfo:
+        validate_features([VALID] * 3, max_rows=2)
+    assert excinfo.value.status_code == 413
+
+
+def test_empty_payload_is_rejected_even_with_allow_missing():
+    with pytest.raises(SchemaValidationError) as excinfo:
+        validate_features({}, allow_missing=True)
+    assert {error['field'] for error in excinfo.value.errors} == set(VALID)
+
+
+def test_misspelled_field_is_rejected_with_allow_missing():
+    record = dict(VALID)
+    record['Carat'] = record.pop('carat')
+    with pytest.raises(SchemaValidationError) as excinfo:
+        validate_features([VALID, record], allow_missing=True)
+    assert sorted((error['row'], error['field'], error['message']) for error in excinfo.value.errors) == [
+        (1, 'Carat', 'unknown field'), (1, 'carat', 'field is missing')]
+
+
+def test_absent_column_is_rejected_with_allow_missing():
+    payload = {name: [value] for name, value in VALID.items() if name != 'clarity'}
+    with pytest.raises(SchemaValidationError) as excinfo:
+        validate_features(payload, allow_missing=True)
+    assert [(error['field'], error['message']) for error in excinfo.value.errors] == [('clarity', 'field is missing')]
+
+
+def test_explicit_null_is_imputed_with_allow_missing():
+    features = validate_features([dict(VALID, carat=None, cut=None)], allow_missing=True)
+    assert np.isnan(features.numeric[0, 0])
+    assert features.categorical[0, 0] != features.categorical[0, 0]